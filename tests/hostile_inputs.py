@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+NFO Validator Hostile Input Tests
+Generates adversarial documents (oversized, deeply nested, element bombs,
+entity expansion, external entities, zip bombs, schema validation that never
+ends) and checks that the validator rejects each one quickly with a resource
+limit error instead of exhausting memory or stalling.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tools', 'python-validator'))
+
+from nfo_limits import ParseLimits  # noqa: E402
+from nfo_validator import NFOValidator  # noqa: E402
+
+HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n{doctype}'
+          '<root xmlns="NFOStandard" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+          'xsi:schemaLocation="NFOStandard https://xsd.nfostandard.com/v2/main.xsd">'
+          '<media><movie><title>{title}</title>{body}</movie></media></root>\n')
+
+# Limits small enough to keep the generated documents small
+LIMITS = ParseLimits(max_bytes=1024 * 1024, max_depth=64, max_elements=10_000)
+
+# Every hostile document must be rejected within this many seconds
+MAX_SECONDS = 5.0
+
+
+def movie(body: str = '', title: str = 'Hostile', doctype: str = '') -> bytes:
+    return HEADER.format(doctype=doctype, title=title, body=body).encode('utf-8')
+
+
+def oversized() -> bytes:
+    return movie(f"<plot>{'x' * (2 * LIMITS.max_bytes)}</plot>")
+
+
+def deeply_nested() -> bytes:
+    depth = LIMITS.max_depth * 2
+    return movie('<extra>' * depth + '</extra>' * depth)
+
+
+def element_bomb() -> bytes:
+    return movie('<genre>Drama</genre>' * (LIMITS.max_elements * 2))
+
+
+def billion_laughs() -> bytes:
+    entities = ['<!ENTITY lol0 "lol">']
+    for level in range(1, 10):
+        entities.append(f'<!ENTITY lol{level} "' + f'&lol{level - 1};' * 10 + '">')
+    doctype = '<!DOCTYPE root [' + ''.join(entities) + ']>\n'
+    return movie(title='&lol9;', doctype=doctype)
+
+
+def external_entity(secret_path: str, body: str = '') -> bytes:
+    doctype = f'<!DOCTYPE root [<!ENTITY secret SYSTEM "file://{secret_path}">]>\n'
+    return movie(body, title='&secret;', doctype=doctype)
+
+
+def zip_bomb(directory: str) -> str:
+    path = os.path.join(directory, 'bomb.zip')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('movie.nfo', movie(f"<plot>{'0' * (8 * LIMITS.max_bytes)}</plot>"))
+    return path
+
+
+def stalling_schema(directory: str) -> str:
+    """A schema directory whose v2 main.xsd makes libxml2 backtrack: checking
+    (a|aa)*b against a run of 31 a's takes a fraction of a second, and
+    libxml2 does it for every <item> in one uninterruptible call."""
+    schema_dir = os.path.join(directory, 'stalling')
+    os.makedirs(os.path.join(schema_dir, 'v2'))
+    with open(os.path.join(schema_dir, 'v2', 'main.xsd'), 'w') as f:
+        f.write('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" '
+                'targetNamespace="NFOStandard" elementFormDefault="qualified">'
+                '<xs:element name="root"><xs:complexType><xs:sequence>'
+                '<xs:element name="item" maxOccurs="unbounded"><xs:simpleType>'
+                '<xs:restriction base="xs:string"><xs:pattern value="(a|aa)*b"/>'
+                '</xs:restriction></xs:simpleType></xs:element>'
+                '</xs:sequence></xs:complexType></xs:element></xs:schema>')
+    return schema_dir
+
+
+def stalling_document(directory: str) -> str:
+    path = os.path.join(directory, 'stalling.nfo')
+    with open(path, 'w') as f:
+        f.write('<root xmlns="NFOStandard" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                'xsi:schemaLocation="NFOStandard https://xsd.nfostandard.com/v2/main.xsd">'
+                + f"<item>{'a' * 31}</item>" * 1000 + '</root>')
+    return path
+
+
+def minimal_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'valid', 'movie_minimal.xml')
+
+
+def check(name: str, run: Callable[[], Tuple[bool, List[str]]],
+          expected: str = None, forbidden: str = None) -> bool:
+    """Run one case: it must be rejected in time, with an expected error."""
+    start = time.perf_counter()
+    is_valid, errors = run()
+    seconds = time.perf_counter() - start
+
+    problems = []
+    if is_valid:
+        problems.append("accepted")
+    if expected and not any(error.startswith(expected) for error in errors):
+        problems.append(f"no {expected!r} error in {errors}")
+    if forbidden and any(forbidden in error for error in errors):
+        problems.append("leaked the content of an external entity")
+    if seconds > MAX_SECONDS:
+        problems.append(f"took {seconds:.2f}s")
+
+    if problems:
+        print(f"  ✗ {name}: {'; '.join(problems)}")
+        return False
+    print(f"  ✓ {name} ({seconds * 1000:.0f} ms): {errors[0][:80] if errors else ''}")
+    return True
+
+
+def main():
+    """Main entry point."""
+    validator = NFOValidator(limits=LIMITS)
+    limit_error = 'Resource limit exceeded:'
+    results = []
+
+    print("Testing hostile inputs...")
+    with tempfile.TemporaryDirectory() as directory:
+        big = os.path.join(directory, 'oversized.nfo')
+        with open(big, 'wb') as f:
+            f.write(oversized())
+        results.append(check('oversized file', lambda: validator.validate_file(big),
+                             limit_error))
+        results.append(check('oversized bytes',
+                             lambda: validator.validate_bytes(oversized()), limit_error))
+        results.append(check('deeply nested',
+                             lambda: validator.validate_bytes(deeply_nested()), limit_error))
+        results.append(check('element bomb',
+                             lambda: validator.validate_bytes(element_bomb()), limit_error))
+        doctype_error = 'Resource limit exceeded: DOCTYPE declarations are not allowed'
+        results.append(check('billion laughs',
+                             lambda: validator.validate_bytes(billion_laughs()), doctype_error))
+
+        secret = os.path.join(directory, 'secret.txt')
+        with open(secret, 'w') as f:
+            f.write('TOP-SECRET-CONTENT')
+        results.append(check('external entity',
+                             lambda: validator.validate_bytes(external_entity(secret)),
+                             doctype_error, forbidden='TOP-SECRET-CONTENT'))
+        # Over PARSE_CHUNK bytes, so parsed incrementally
+        padding = '<genre>Drama</genre>' * 4000
+        results.append(check('external entity (large document)',
+                             lambda: validator.validate_bytes(external_entity(secret, padding)),
+                             doctype_error, forbidden='TOP-SECRET-CONTENT'))
+
+        bomb = zip_bomb(directory)
+
+        def validate_zip():
+            (_, is_valid, errors), = validator.validate_archive(bomb)
+            return is_valid, errors
+        results.append(check('zip bomb', validate_zip, limit_error))
+
+        # Just under the size limit, but with no time to parse it
+        slow = movie(f"<plot>{'x' * (LIMITS.max_bytes - 1024)}</plot>")
+        timed = NFOValidator(limits=LIMITS._replace(timeout=1e-6))
+        results.append(check('timeout', lambda: timed.validate_bytes(slow), 'Timeout:'))
+
+        # A phase that stalls in Python code is interrupted by the alarm
+        stalled = NFOValidator(limits=LIMITS._replace(timeout=0.2))
+        stalled.add_hook(lambda name, phase, wall, cpu: phase == 'parse' and time.sleep(60))
+        results.append(check('stalled phase',
+                             lambda: stalled.validate_file(minimal_path()), 'Timeout:'))
+
+        # Schema validation that stalls inside libxml2 cannot be interrupted;
+        # its pool worker is killed and replaced
+        stalling = NFOValidator(offline=True, schema_dir=stalling_schema(directory),
+                                limits=LIMITS._replace(timeout=0.5))
+        document = stalling_document(directory)
+
+        def validate_stalling():
+            results = list(stalling.validate_files([document, minimal_path()], jobs=2))
+            # The other file is still validated (against the stalling schema)
+            if len(results) != 2:
+                return True, [f"{len(results)} results"]
+            (_, is_valid, errors), = [result for result in results if result[0] == document]
+            return is_valid, errors
+        results.append(check('stalled schema validation', validate_stalling, 'Timeout:'))
+
+    print("\nTesting that ordinary documents still validate...")
+    is_valid, errors = validator.validate_file(minimal_path())
+    if is_valid:
+        print("  ✓ movie_minimal.xml")
+        results.append(True)
+    else:
+        print(f"  ✗ movie_minimal.xml: {errors}")
+        results.append(False)
+
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
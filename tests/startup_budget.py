@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+NFO Validator Startup Budget
+Checks that importing the Python validator stays cheap: modules needed only
+by optional features must not be imported up front, and the total import
+time (measured with `python -X importtime`) must stay within a budget.
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict
+
+VALIDATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'tools', 'python-validator')
+
+# Modules that only optional code paths need
+DEFERRED_MODULES = [
+    'requests',
+    'lxml.etree',
+    'multiprocessing',
+    'sqlite3',
+    'xml.etree.ElementTree',
+    'concurrent.futures',
+    'asyncio',
+    'json',
+    'nfo_manifest',
+    'nfo_rules',
+    'nfo_shard',
+    'nfo_dedupe',
+    'nfo_git',
+    'nfo_reports',
+    'nfo_consistency',
+    'nfo_async',
+    'nfo_cache',
+    'nfo_pool',
+]
+
+
+def measure_imports(module: str = 'nfo_validator') -> Dict[str, int]:
+    """Import module in a fresh interpreter.
+
+    Returns the cumulative import time (us) of module and of every module it
+    pulled in; modules imported by interpreter startup (site) are excluded.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=VALIDATOR_DIR, capture_output=True, text=True, check=True)
+
+    # Nested imports are listed (indented) before the module that caused them
+    timings = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+        if not name[1:].startswith(' '):
+            if name.strip() == module:
+                return timings
+            timings = {}
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check the validator startup budget')
+    parser.add_argument('--budget-ms', type=float, default=80.0,
+                       help='Maximum import time of nfo_validator in ms (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=5,
+                       help='Take the best of this many runs (default: %(default)s)')
+
+    args = parser.parse_args()
+
+    runs = [measure_imports() for _ in range(args.runs)]
+    best = min(runs, key=lambda timings: timings['nfo_validator'])
+    import_ms = best['nfo_validator'] / 1000
+
+    failures = []
+    for module in DEFERRED_MODULES:
+        if module in best:
+            failures.append(f"{module} is imported at startup")
+    if import_ms > args.budget_ms:
+        failures.append(f"import took {import_ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+
+    print(f"nfo_validator import time: {import_ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+    slowest = sorted(best.items(), key=lambda item: item[1], reverse=True)[:5]
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if failures:
+        for failure in failures:
+            print(f"  ✗ {failure}")
+        sys.exit(1)
+    print("  ✓ within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+NFO Validator Stored Result Tests
+Validates one file with and without --strict in the same run (a directory
+and a file named inside it) on a process pool, with each way of reusing
+results: the result cache, the manifest and deduplication. The first run,
+which stores results, and the second, which is answered from them, must
+both report what a plain serial run reports.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+VALIDATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools',
+                         'python-validator', 'nfo_validator.py')
+
+# movie_minimal.xml has no year, which only strict mode reports
+DOCUMENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'valid',
+                        'movie_minimal.xml')
+
+
+def run(paths: List[str], *options: str) -> List[tuple]:
+    """Sorted (file, valid, errors) results of one command line run."""
+    output = subprocess.run([sys.executable, VALIDATOR, '--offline', '-f', 'ndjson',
+                             *options, *paths],
+                            capture_output=True, text=True).stdout
+    results = [json.loads(line) for line in output.splitlines() if line.startswith('{')]
+    return sorted((r['file'], r['valid'], tuple(r['errors'])) for r in results)
+
+
+def main():
+    """Main entry point."""
+    results = []
+
+    print("Testing strict and non-strict results for one file...")
+    with tempfile.TemporaryDirectory() as directory:
+        library = os.path.join(directory, 'library')
+        os.mkdir(library)
+        # Two copies, so deduplication has a duplicate of each task
+        for name in ('a.nfo', 'b.nfo'):
+            shutil.copy(DOCUMENT, os.path.join(library, name))
+        paths = ['--strict', library, os.path.join(library, 'a.nfo')]
+
+        expected = run(paths)
+        if len({(file, valid) for file, valid, _ in expected}) != 3:
+            print(f"  ✗ strict and non-strict results do not differ: {expected}")
+            sys.exit(1)
+
+        modes = {
+            'result cache': ['--cache', os.path.join(directory, 'cache.db')],
+            'manifest': ['--since-manifest', os.path.join(directory, 'manifest.db')],
+            'dedupe': ['--dedupe'],
+            'dedupe with result cache': ['--dedupe', '--cache',
+                                         os.path.join(directory, 'dedupe-cache.db')],
+        }
+        for mode, options in modes.items():
+            for attempt in ('first run', 'second run'):
+                actual = run(paths, '-j', '2', *options)
+                if actual == expected:
+                    print(f"  ✓ {mode}, {attempt}")
+                    results.append(True)
+                else:
+                    print(f"  ✗ {mode}, {attempt}: {actual}")
+                    results.append(False)
+
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,17 @@
 """
 NFO Standard Test Suite Runner
 Runs validation tests on all test files and reports results.
+
+Every category is validated in one parallel run against the local (offline)
+schemas. Per-file timings go into the report and can be compared with a
+stored baseline, failing the run when the schemas got slower.
 """
 
+import contextlib
 import os
 import sys
 import json
+import time
 from pathlib import Path
 from typing import Dict, List, Tuple
 import subprocess
@@ -15,56 +21,101 @@ import subprocess
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tools', 'python-validator'))
 
 try:
-    from nfo_validator import NFOValidator
+    from nfo_validator import CACHE_ENV, NFOValidator
 except ImportError:
     print("Error: Could not import NFO validator. Make sure to run from the project root.")
     sys.exit(1)
 
 
+# Test category -> directory holding its files
+CATEGORIES = {
+    'valid': 'valid',
+    'invalid': 'invalid',
+    'edge_cases': 'edge-cases',
+}
+
+
 class TestRunner:
-    def __init__(self):
-        self.validator = NFOValidator()
+    def __init__(self, cache: str = None, jobs: int = 0, schema_dir: str = None):
+        self.validator = NFOValidator(offline=True, schema_dir=schema_dir, cache=cache)
+        self.jobs = jobs
         self.results = {
             'valid': {'passed': 0, 'failed': 0, 'files': []},
             'invalid': {'passed': 0, 'failed': 0, 'files': []},
             'edge_cases': {'passed': 0, 'failed': 0, 'files': []}
         }
+        # Seconds spent validating each file ("valid/movie.xml"), schema
+        # compilation excluded
+        self.file_times: Dict[str, float] = {}
+        # Schema version -> seconds to compile its schema (slowest worker)
+        self.compile_times: Dict[str, float] = {}
+        self.elapsed = 0.0
     
     def run_tests(self, test_dir: str):
         """Run all tests in the specified directory."""
         test_path = Path(test_dir)
+        files = {category: sorted((test_path / directory).glob('*.xml'))
+                 for category, directory in CATEGORIES.items()
+                 if (test_path / directory).exists()}
         
-        # Test valid files (should pass validation)
-        valid_dir = test_path / 'valid'
-        if valid_dir.exists():
-            print("Testing valid files...")
-            for file in valid_dir.glob('*.xml'):
-                self._test_valid_file(file)
-        
-        # Test invalid files (should fail validation)
-        invalid_dir = test_path / 'invalid'
-        if invalid_dir.exists():
-            print("\nTesting invalid files...")
-            for file in invalid_dir.glob('*.xml'):
-                self._test_invalid_file(file)
+        # All categories share one run, so the pool stays busy across them
+        start = time.perf_counter()
+        results = self._validate([filepath for paths in files.values() for filepath in paths])
+        self.elapsed = time.perf_counter() - start
         
-        # Test edge cases
-        edge_dir = test_path / 'edge-cases'
-        if edge_dir.exists():
-            print("\nTesting edge cases...")
-            for file in edge_dir.glob('*.xml'):
-                self._test_edge_case_file(file)
+        checks = {
+            'valid': ("Testing valid files...", self._test_valid_file),
+            'invalid': ("Testing invalid files...", self._test_invalid_file),
+            'edge_cases': ("Testing edge cases...", self._test_edge_case_file),
+        }
+        for number, (category, paths) in enumerate(files.items()):
+            heading, check = checks[category]
+            print(("\n" if number else "") + heading)
+            for filepath in paths:
+                check(filepath, *results[str(filepath)])
         
         return self._generate_report()
     
-    def _test_valid_file(self, filepath: Path):
-        """Test a file that should be valid."""
-        is_valid, errors = self.validator.validate_file(str(filepath))
+    def _validate(self, paths: List[Path]) -> Dict[str, Tuple[bool, List[str]]]:
+        """Validate paths on the pool, recording per-file and compile timings."""
+        totals: Dict[str, float] = {}
+        # Compile time not yet taken off a file's total
+        compiling = [0.0]
+        
+        def timing(name: str, phase: str, wall: float, cpu: float):
+            # Schemas are compiled while validating the first file that needs
+            # them (in each worker); phases of a file arrive before its total
+            if phase.startswith('compile:'):
+                version = phase[len('compile:'):]
+                self.compile_times[version] = max(self.compile_times.get(version, 0.0), wall)
+                compiling[0] += wall
+            elif phase == 'total':
+                totals[name] = max(wall - compiling[0], 0.0)
+                compiling[0] = 0.0
         
+        self.validator.add_hook(timing)
+        try:
+            results = {name: (is_valid, errors) for name, is_valid, errors
+                       in self.validator.validate_files(paths, jobs=self.jobs)}
+        finally:
+            self.validator.hooks.remove(timing)
+        
+        for filepath in paths:
+            self.file_times[self._key(filepath)] = totals.get(str(filepath), 0.0)
+        return results
+    
+    @staticmethod
+    def _key(filepath: Path) -> str:
+        """Baseline key of a test file: its category directory and name."""
+        return f"{filepath.parent.name}/{filepath.name}"
+    
+    def _test_valid_file(self, filepath: Path, is_valid: bool, errors: List[str]):
+        """Test a file that should be valid."""
         result = {
             'file': filepath.name,
             'valid': is_valid,
-            'errors': errors
+            'errors': errors,
+            'seconds': self.file_times[self._key(filepath)]
         }
         
         if is_valid:
@@ -78,10 +129,8 @@ class TestRunner:
         
         self.results['valid']['files'].append(result)
     
-    def _test_invalid_file(self, filepath: Path):
+    def _test_invalid_file(self, filepath: Path, is_valid: bool, errors: List[str]):
         """Test a file that should be invalid."""
-        is_valid, errors = self.validator.validate_file(str(filepath))
-        
         # Extract expected error from file comments
         expected_error = self._extract_expected_error(filepath)
         
@@ -89,7 +138,8 @@ class TestRunner:
             'file': filepath.name,
             'valid': is_valid,
             'errors': errors,
-            'expected_error': expected_error
+            'expected_error': expected_error,
+            'seconds': self.file_times[self._key(filepath)]
         }
         
         if not is_valid:
@@ -106,35 +156,25 @@ class TestRunner:
         
         self.results['invalid']['files'].append(result)
     
-    def _test_edge_case_file(self, filepath: Path):
+    def _test_edge_case_file(self, filepath: Path, is_valid: bool, errors: List[str]):
         """Test an edge case file."""
-        try:
-            is_valid, errors = self.validator.validate_file(str(filepath))
-            
-            result = {
-                'file': filepath.name,
-                'valid': is_valid,
-                'errors': errors
-            }
-            
-            if is_valid:
-                self.results['edge_cases']['passed'] += 1
-                print(f"  ✓ {filepath.name}")
-            else:
-                self.results['edge_cases']['failed'] += 1
-                print(f"  ✗ {filepath.name}")
-                for error in errors:
-                    print(f"    - {error}")
+        result = {
+            'file': filepath.name,
+            'valid': is_valid,
+            'errors': errors,
+            'seconds': self.file_times[self._key(filepath)]
+        }
             
-            self.results['edge_cases']['files'].append(result)
-        except Exception as e:
+        if is_valid:
+            self.results['edge_cases']['passed'] += 1
+            print(f"  ✓ {filepath.name}")
+        else:
             self.results['edge_cases']['failed'] += 1
-            print(f"  ✗ {filepath.name} (exception: {str(e)})")
-            self.results['edge_cases']['files'].append({
-                'file': filepath.name,
-                'valid': False,
-                'errors': [f"Exception: {str(e)}"]
-            })
+            print(f"  ✗ {filepath.name}")
+            for error in errors:
+                print(f"    - {error}")
+            
+        self.results['edge_cases']['files'].append(result)
     
     def _extract_expected_error(self, filepath: Path) -> str:
         """Extract expected error message from file comments."""
@@ -150,6 +190,15 @@ class TestRunner:
             pass
         return ""
     
+    def timing(self) -> Dict:
+        """Timings of the last run, in the format of a baseline file."""
+        return {
+            'elapsed': self.elapsed,
+            'total': sum(self.file_times.values()) + sum(self.compile_times.values()),
+            'compile': dict(sorted(self.compile_times.items())),
+            'files': dict(sorted(self.file_times.items())),
+        }
+    
     def _generate_report(self) -> Dict:
         """Generate a test report."""
         total_tests = 0
@@ -166,12 +215,38 @@ class TestRunner:
                 'failed': total_tests - total_passed,
                 'pass_rate': f"{(total_passed/total_tests*100):.1f}%" if total_tests > 0 else "0%"
             },
-            'categories': self.results
+            'categories': self.results,
+            'timing': self.timing()
         }
         
         return report
 
 
+def compare_timings(timing: Dict, baseline: Dict, threshold: float,
+                    slack: float) -> List[str]:
+    """Describe every time in timing that regressed against baseline.
+    
+    A time regresses when it exceeds its baseline by more than threshold
+    (a fraction) plus slack seconds; the slack keeps sub-millisecond noise on
+    small files from failing the run. Entries missing from the baseline are
+    new and are not compared.
+    """
+    def regressed(label: str, seconds: float, before: float) -> List[str]:
+        if seconds > before * (1 + threshold) + slack:
+            return [f"{label}: {seconds * 1000:.1f} ms (baseline {before * 1000:.1f} ms)"]
+        return []
+    
+    regressions = []
+    if 'total' in baseline:
+        regressions += regressed('total', timing['total'], baseline['total'])
+    for section in ('compile', 'files'):
+        for name, seconds in timing[section].items():
+            if name in baseline.get(section, {}):
+                label = f"compile {name}" if section == 'compile' else name
+                regressions += regressed(label, seconds, baseline[section][name])
+    return regressions
+
+
 def main():
     """Main entry point."""
     import argparse
@@ -180,30 +255,82 @@ def main():
     parser.add_argument('test_dir', nargs='?', default='tests',
                        help='Directory containing test files')
     parser.add_argument('--json', action='store_true',
-                       help='Output results as JSON')
+                       help='Output results as JSON (other output goes to stderr)')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Verbose output')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                       help='Worker processes (default: one per CPU; 1 = serial)')
+    parser.add_argument('--schema-dir',
+                       help='Directory containing the schema versions (default: this repository)')
+    parser.add_argument('--cache', metavar='PATH', default=os.environ.get(CACHE_ENV) or None,
+                       help='Result cache shared with the validator and migration tools '
+                            f'(default: ${CACHE_ENV}, if set)')
+    parser.add_argument('--baseline', metavar='PATH',
+                       help='Fail if timings regressed against this baseline file')
+    parser.add_argument('--update-baseline', action='store_true',
+                       help='Write the timings of this run to --baseline instead of comparing')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                       help='Allowed slowdown against the baseline, as a fraction '
+                            '(default: %(default)s)')
+    parser.add_argument('--slack-ms', type=float, default=5.0,
+                       help='Allowed slowdown in ms on top of --threshold, for timing noise '
+                            '(default: %(default)s)')
     
     args = parser.parse_args()
     
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline requires --baseline")
+    if args.baseline and args.cache:
+        # Cache hits would be timed instead of validation
+        parser.error("--baseline cannot be combined with --cache")
+    
+    # With --json, stdout carries the report alone
+    if args.json:
+        with contextlib.redirect_stdout(sys.stderr):
+            report, failed = run(args)
+        print(json.dumps(report, indent=2))
+    else:
+        report, failed = run(args)
+    
+    # Exit with appropriate code
+    sys.exit(1 if failed else 0)
+
+
+def run(args) -> Tuple[Dict, bool]:
+    """Run the tests and print their progress and summary; returns the
+    report and whether anything failed."""
     # Check if test directory exists
     if not os.path.exists(args.test_dir):
         print(f"Error: Test directory '{args.test_dir}' not found")
         sys.exit(1)
     
     # Run tests
-    runner = TestRunner()
+    runner = TestRunner(cache=args.cache, jobs=args.jobs, schema_dir=args.schema_dir)
     report = runner.run_tests(args.test_dir)
+    if runner.validator.cache is not None:
+        print(runner.validator.cache.stats.format_summary())
+    runner.validator.close()
+    
+    regressions = []
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report['timing'], f, indent=2)
+            f.write('\n')
+    elif args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_timings(report['timing'], baseline, args.threshold,
+                                      args.slack_ms / 1000)
+        report['regressions'] = regressions
     
     # Output results
     print("\n" + "="*60)
     print("TEST SUMMARY")
     print("="*60)
     
-    if args.json:
-        print(json.dumps(report, indent=2))
-    else:
-        summary = report['summary']
+    summary = report['summary']
+    timing = report['timing']
+    if not args.json:
         print(f"Total Tests: {summary['total_tests']}")
         print(f"Passed: {summary['passed']}")
         print(f"Failed: {summary['failed']}")
@@ -214,8 +341,22 @@ def main():
         print(f"  Invalid Files: {report['categories']['invalid']['passed']}/{report['categories']['invalid']['passed'] + report['categories']['invalid']['failed']}")
         print(f"  Edge Cases: {report['categories']['edge_cases']['passed']}/{report['categories']['edge_cases']['passed'] + report['categories']['edge_cases']['failed']}")
     
-    # Exit with appropriate code
-    sys.exit(0 if summary['failed'] == 0 else 1)
+        print("\nTiming:")
+        print(f"  Elapsed: {timing['elapsed'] * 1000:.1f} ms")
+        print(f"  Total: {timing['total'] * 1000:.1f} ms")
+        for version, seconds in timing['compile'].items():
+            print(f"  Compile {version}: {seconds * 1000:.1f} ms")
+        if args.verbose:
+            for name, seconds in timing['files'].items():
+                print(f"  {name}: {seconds * 1000:.1f} ms")
+        if args.update_baseline:
+            print(f"\nBaseline written to {args.baseline}")
+        elif args.baseline:
+            print(f"\nTiming regressions: {len(regressions)}")
+            for regression in regressions:
+                print(f"  ✗ {regression}")
+    
+    return report, summary['failed'] > 0 or bool(regressions)
 
 
 if __name__ == "__main__":
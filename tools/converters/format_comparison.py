@@ -168,8 +168,11 @@ def count_fields(obj, count=0):
 
 def compare_directory(directory: str) -> None:
     """Compare all NFO files in a directory."""
-    path = Path(directory)
-    nfo_files = list(path.glob("**/*.nfo")) + list(path.glob("**/*.xml"))
+    # One walk for both extensions, visiting the directories glob("**/*.nfo")
+    # would (hidden and artwork ones too); .nfo files are listed first
+    nfo_files = sorted((path for path in Path(directory).rglob("*")
+                        if path.suffix in ('.nfo', '.xml') and path.is_file()),
+                       key=lambda path: path.suffix != '.nfo')
     
     if not nfo_files:
         print(f"No NFO/XML files found in {directory}")
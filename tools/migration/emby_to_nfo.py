@@ -21,7 +21,9 @@ class EmbyToNFOConverter:
     NAMESPACE = "NFOStandard"
     SCHEMA_LOCATION = "NFOStandard https://xsd.nfostandard.com/main.xsd"
     
-    def __init__(self):
+    def __init__(self, validator=None):
+        # NFOValidator checking every converted file, if given
+        self.validator = validator
         ET.register_namespace("", self.NAMESPACE)
         ET.register_namespace("xsi", "http://www.w3.org/2001/XMLSchema-instance")
     
@@ -46,12 +48,21 @@ class EmbyToNFOConverter:
                 output_path = input_path.replace('.nfo', '_converted.nfo')
             
             self._write_xml(nfo_root, output_path)
+            if self.validator is not None:
+                return self._validate_output(output_path)
             return True
             
         except Exception as e:
             print(f"Error converting {input_path}: {e}")
             return False
     
+    def _validate_output(self, output_path: str) -> bool:
+        """Validate a converted file against the NFO Standard schema."""
+        is_valid, errors = self.validator.validate_file(output_path)
+        for error in errors:
+            print(f"Invalid output {output_path}: {error}")
+        return is_valid
+    
     def _determine_media_type(self, root: ET.Element) -> Optional[str]:
         """Determine media type from Emby/Jellyfin NFO."""
         tag = root.tag.lower()
@@ -504,6 +515,7 @@ Examples:
   %(prog)s tvshow.nfo -o tvshow_standard.nfo
   %(prog)s /path/to/library/ --recursive
   %(prog)s /path/to/library/ --in-place --backup
+  %(prog)s /path/to/library/ --recursive --validate --cache ~/.cache/nfo-results.db
         """
     )
     
@@ -515,11 +527,31 @@ Examples:
                        help='Convert files in place (creates .backup files)')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='Verbose output')
+    parser.add_argument('--validate', action='store_true',
+                       help='Validate converted files; invalid output counts as failed')
+    parser.add_argument('--cache', metavar='PATH',
+                       help='Result cache shared with the validator, used with --validate '
+                            '(default: $NFO_VALIDATOR_CACHE, if set)')
     
     args = parser.parse_args()
     
-    converter = EmbyToNFOConverter()
+    validator = None
+    if args.validate:
+        sys.path.append(str(Path(__file__).resolve().parent.parent / 'python-validator'))
+        from nfo_validator import CACHE_ENV, NFOValidator
+        validator = NFOValidator(cache=args.cache or os.environ.get(CACHE_ENV) or None)
     
+    converter = EmbyToNFOConverter(validator)
+    try:
+        _convert(args, converter)
+    finally:
+        if validator is not None:
+            if validator.cache is not None:
+                print(validator.cache.stats.format_summary())
+            validator.close()
+
+
+def _convert(args, converter: EmbyToNFOConverter):
     if os.path.isfile(args.input):
         # Single file conversion
         success = converter.convert_file(args.input, args.output)
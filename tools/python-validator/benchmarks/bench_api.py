@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+NFO Validator API Micro-Benchmark
+Measures the per-call cost of the in-memory entry points (validate_bytes,
+validate_tree) against validate_file on the same documents, on one thread
+and on a thread pool sharing a single validator.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import CorpusGenerator
+
+ENTRY_POINTS = ('validate_file', 'validate_bytes', 'validate_tree')
+
+
+def _calls(validator, entry_point: str, paths: List[str],
+           documents: List[bytes]) -> List[Callable[[], tuple]]:
+    """One zero-argument call per document for the given entry point."""
+    if entry_point == 'validate_file':
+        return [lambda path=path: validator.validate_file(path) for path in paths]
+    if entry_point == 'validate_bytes':
+        return [lambda data=data, path=path: validator.validate_bytes(data, path)
+                for data, path in zip(documents, paths)]
+    # validate_tree gets documents parsed up front, as a caller already
+    # holding a tree would
+    trees = [etree.fromstring(data).getroottree() for data in documents]
+    return [lambda tree=tree, path=path: validator.validate_tree(tree, path)
+            for tree, path in zip(trees, paths)]
+
+
+def measure(validator, calls: List[Callable[[], tuple]], threads: int,
+            repeat: int) -> Dict:
+    """Run every call repeat times; return the best per-call time in microseconds."""
+    best = float('inf')
+    invalid = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if threads <= 1:
+            results = [call() for call in calls]
+        else:
+            with ThreadPoolExecutor(threads) as executor:
+                results = list(executor.map(lambda call: call(), calls))
+        best = min(best, time.perf_counter() - start)
+        invalid = sum(1 for is_valid, _ in results if not is_valid)
+    return {'us_per_call': best / len(calls) * 1e6, 'invalid': invalid}
+
+
+def main():
+    from nfo_validator import NFOValidator
+
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory validator API")
+    parser.add_argument('--count', '-n', type=int, default=500,
+                       help='Documents per run (default: %(default)s)')
+    parser.add_argument('--actors', type=int, default=5,
+                       help='Cast members per document (default: %(default)s)')
+    parser.add_argument('--threads', type=int, default=4,
+                       help='Threads for the concurrent runs (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Take the best of this many runs (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed')
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = CorpusGenerator(seed=args.seed, actors=args.actors).generate(tmp, args.count)
+        documents = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                documents.append(f.read())
+
+        validator = NFOValidator(offline=True)
+        validator.schema_pool.preload()
+
+        print(f"{'Entry point':<16} {'Threads':>8} {'us/call':>10}")
+        for entry_point in ENTRY_POINTS:
+            calls = _calls(validator, entry_point, paths, documents)
+            for threads in (1, args.threads):
+                result = measure(validator, calls, threads, args.repeat)
+                if result['invalid']:
+                    print(f"  {result['invalid']} documents unexpectedly invalid",
+                          file=sys.stderr)
+                print(f"{entry_point:<16} {threads:>8} {result['us_per_call']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+NFO Validator Async Benchmark
+Validates the same generated corpus from inside an asyncio event loop with
+the blocking API (validate_file called from a coroutine) and with
+AsyncNFOValidator on threads and on worker processes, reporting throughput
+and the worst event-loop stall each one causes.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import CorpusGenerator
+
+# Interval of the heartbeat used to measure event-loop stalls
+TICK = 0.001
+
+
+async def _heartbeat(stalls: List[float], stop: asyncio.Event):
+    """Record how late each tick is; a late tick means the loop was blocked."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        stalls.append(time.perf_counter() - start - TICK)
+
+
+async def _run(mode: str, directory: str, workers: int) -> Dict:
+    from nfo_async import AsyncNFOValidator
+    from nfo_validator import NFOValidator
+
+    validator = NFOValidator(offline=True)
+    validator.schema_pool.preload()
+    stalls: List[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.ensure_future(_heartbeat(stalls, stop))
+    await asyncio.sleep(TICK)
+
+    start = time.perf_counter()
+    if mode == 'sync':
+        # What a service calling the blocking API from a coroutine gets
+        files = 0
+        for filepath in validator._find_files(directory, recursive=True):
+            validator.validate_file(filepath)
+            files += 1
+            await asyncio.sleep(0)
+    else:
+        options = {'processes': workers} if mode == 'async-processes' else {'threads': workers}
+        async with AsyncNFOValidator(validator, **options) as async_validator:
+            files = 0
+            async for _ in async_validator.iter_validate(directory, recursive=True):
+                files += 1
+    seconds = time.perf_counter() - start
+
+    stop.set()
+    await heartbeat
+    stalls.sort()
+    return {'files_per_sec': files / seconds,
+            'max_stall_ms': stalls[-1] * 1000 if stalls else 0.0,
+            'p99_stall_ms': stalls[int(len(stalls) * 0.99)] * 1000 if stalls else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark async validation against the sync API")
+    parser.add_argument('--count', '-n', type=int, default=2000,
+                       help='Documents in the corpus (default: %(default)s)')
+    parser.add_argument('--actors', type=int, default=5,
+                       help='Cast members per document (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='Threads or processes for the async modes (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed')
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        CorpusGenerator(seed=args.seed, actors=args.actors).generate(tmp, args.count)
+
+        print(f"{'Mode':<16} {'files/sec':>10} {'max stall ms':>13} {'p99 stall ms':>13}")
+        for mode in ('sync', 'async-threads', 'async-processes'):
+            result = asyncio.run(_run(mode, tmp, args.workers))
+            print(f"{mode:<16} {result['files_per_sec']:>10.0f} "
+                  f"{result['max_stall_ms']:>13.1f} {result['p99_stall_ms']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+NFO Schema Profiler
+Shows schema authors where the cost of the XSD set goes. Each module that
+main.xsd includes is compiled on its own and in combination (main.xsd, all
+modules, and all modules but one, whose difference is that module's share).
+Compile times are taken in one process, cycling through the targets so drift
+affects them all alike; RSS growth is measured in a fresh process per
+target. A generated corpus is then validated against main.xsd to split
+validation time by media type.
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import CorpusGenerator, MEDIA_TYPES
+
+XS = '{http://www.w3.org/2001/XMLSchema}'
+
+# Combinations compiled besides the single modules
+MAIN = 'main'
+ALL = 'all'
+WITHOUT = 'without:'
+
+
+def _rss_kb() -> int:
+    """Current RSS where /proc has it (Linux), else peak RSS."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _registry(schema_dir: str = None):
+    from nfo_schemas import SchemaRegistry
+
+    roots = SchemaRegistry.default_roots()
+    if schema_dir:
+        roots.insert(0, schema_dir)
+    return SchemaRegistry(roots)
+
+
+def _main_url(registry, version: str) -> str:
+    return f"https://{registry.SCHEMA_HOST}/{version}/main.xsd"
+
+
+def module_urls(registry, version: str) -> List[str]:
+    """URLs of the modules main.xsd includes, in include order."""
+    from lxml import etree
+
+    path = registry.path_for(_main_url(registry, version))
+    if path is None:
+        raise FileNotFoundError(f"No local copy of the {version} main schema")
+    return [include.get('schemaLocation')
+            for include in etree.parse(path).getroot().iter(f'{XS}include')]
+
+
+def _module_name(url: str) -> str:
+    return url.rsplit('/', 1)[-1]
+
+
+def _compile(registry, version: str, target: str):
+    """Compile one target: MAIN, ALL, WITHOUT + module, or a module name."""
+    from lxml import etree
+
+    main_url = _main_url(registry, version)
+    modules = module_urls(registry, version)
+    if target == MAIN:
+        return registry.load(main_url, allow_network=False)
+    if target == ALL or target.startswith(WITHOUT):
+        excluded = target[len(WITHOUT):] if target.startswith(WITHOUT) else None
+        # The modules' types without main.xsd's root element
+        includes = ''.join(f'<xs:include schemaLocation="{url}"/>' for url in modules
+                           if _module_name(url) != excluded)
+        wrapper = ('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" '
+                   'targetNamespace="NFOStandard" xmlns="NFOStandard" '
+                   f'elementFormDefault="qualified">{includes}</xs:schema>')
+        parser = registry.parser(allow_network=False)
+        return etree.XMLSchema(etree.fromstring(wrapper, parser, base_url=main_url))
+    url = next(url for url in modules if _module_name(url) == target)
+    return registry.load(url, allow_network=False)
+
+
+def measure_rss(target: str, version: str, schema_dir: str) -> int:
+    """Child process: RSS growth (KiB) from compiling target once."""
+    registry = _registry(schema_dir)
+    # Warm up everything but the compile itself (imports, main.xsd lookup)
+    module_urls(registry, version)
+    before = _rss_kb()
+    schema = _compile(registry, version, target)
+    growth = _rss_kb() - before
+    del schema
+    return growth
+
+
+def profile_compile(version: str, schema_dir: str, repeat: int) -> Dict[str, Dict]:
+    """Compile time (best and median of repeat, and every round's time) and
+    RSS growth of every target."""
+    registry = _registry(schema_dir)
+    modules = [_module_name(url) for url in module_urls(registry, version)]
+    targets = modules + [MAIN, ALL] + [WITHOUT + module for module in modules]
+
+    times: Dict[str, List[float]] = {target: [] for target in targets}
+    # A collection landing in one compile would stand out as noise
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for target in targets:
+                start = time.perf_counter()
+                _compile(registry, version, target)
+                times[target].append(time.perf_counter() - start)
+            gc.collect()
+    finally:
+        gc.enable()
+
+    results = {}
+    for target in targets:
+        command = [sys.executable, __file__, '--run-target', target, '--version', version]
+        if schema_dir:
+            command += ['--schema-dir', schema_dir]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        results[target] = {
+            'compile_ms': min(times[target]) * 1e3,
+            'compile_ms_median': statistics.median(times[target]) * 1e3,
+            # In round order, so targets can be compared round by round
+            'compile_ms_runs': [round(seconds * 1e3, 4) for seconds in times[target]],
+            'rss_kb': json.loads(output),
+        }
+    return results
+
+
+def profile_validation(version: str, schema_dir: str, count: int, actors: int,
+                       seed: int, repeat: int) -> Dict[str, Dict]:
+    """Validate a generated corpus against main.xsd, timing each media type.
+
+    Documents are parsed up front, so only validation is timed. Each media
+    type's documents are validated repeat times, cycling through the types,
+    and the fastest pass is reported.
+    """
+    from lxml import etree
+
+    registry = _registry(schema_dir)
+    schema = _compile(registry, version, MAIN)
+    generator = CorpusGenerator(seed=seed, actors=actors)
+    corpus = {media_type: [etree.fromstring(generator.document(media_type))
+                           for _ in range(max(count // len(MEDIA_TYPES), 1))]
+              for media_type in MEDIA_TYPES}
+
+    passes: Dict[str, List[float]] = {media_type: [] for media_type in MEDIA_TYPES}
+    latencies: Dict[str, List[float]] = {media_type: [] for media_type in MEDIA_TYPES}
+    invalid = {media_type: 0 for media_type in MEDIA_TYPES}
+    for round_number in range(repeat):
+        for media_type, docs in corpus.items():
+            elapsed = 0.0
+            for doc in docs:
+                start = time.perf_counter()
+                is_valid = schema.validate(doc)
+                latency = time.perf_counter() - start
+                elapsed += latency
+                latencies[media_type].append(latency)
+                if not is_valid and round_number == 0:
+                    invalid[media_type] += 1
+            passes[media_type].append(elapsed)
+
+    results = {}
+    for media_type, docs in corpus.items():
+        seconds = min(passes[media_type])
+        times = sorted(latencies[media_type])
+        elements = sum(1 for doc in docs for _ in doc.iter(etree.Element))
+        results[media_type] = {
+            'documents': len(docs),
+            'invalid': invalid[media_type],
+            'seconds': seconds,
+            'mean_us': seconds / len(docs) * 1e6,
+            'p99_us': times[min(int(0.99 * len(times)), len(times) - 1)] * 1e6,
+            'us_per_element': seconds / elements * 1e6 if elements else 0.0,
+        }
+    return results
+
+
+def module_share(compiled: Dict, module: str) -> Tuple[float, float]:
+    """What leaving module out of all modules saves (ms), and the noise in it.
+    
+    The machine's speed drifts between rounds, but a round compiles every
+    target within a fraction of a second, so the saving is the median of
+    the per-round differences. Its noise is their interquartile range over
+    the square root of the rounds, about the standard error of the median.
+    """
+    differences = [full - without for full, without in
+                   zip(compiled[ALL]['compile_ms_runs'],
+                       compiled[WITHOUT + module]['compile_ms_runs'])]
+    if len(differences) < 2:
+        return compiled[ALL]['compile_ms'] - compiled[WITHOUT + module]['compile_ms'], 0.0
+    lower, _, upper = statistics.quantiles(differences, n=4)
+    return statistics.median(differences), (upper - lower) / len(differences) ** 0.5
+
+
+def print_report(report: Dict):
+    compiled = report['compile']
+    modules = report['modules']
+    full = compiled[ALL]['compile_ms']
+
+    print(f"{'Module (alone)':<20} {'compile ms':>11} {'median ms':>10} {'RSS KiB':>8}")
+    for module in modules:
+        result = compiled[module]
+        print(f"{module:<20} {result['compile_ms']:>11.2f} "
+              f"{result['compile_ms_median']:>10.2f} {result['rss_kb']:>8}")
+
+    print(f"\n{'Combination':<20} {'compile ms':>11} {'median ms':>10} {'RSS KiB':>8}")
+    for target, label in ((MAIN, 'main.xsd'), (ALL, 'all modules')):
+        result = compiled[target]
+        print(f"{label:<20} {result['compile_ms']:>11.2f} "
+              f"{result['compile_ms_median']:>10.2f} {result['rss_kb']:>8}")
+
+    # What leaving a module out saves; modules others include (common,
+    # person) are compiled anyway and show no share. A saving within its
+    # noise is indistinguishable from none: it is flagged, and clamped to
+    # zero if negative
+    print(f"\n{'Share of all modules':<20} {'ms':>11} {'%':>10} {'RSS KiB':>8} {'noise ms':>9}")
+    flagged = False
+    shares = {module: module_share(compiled, module) for module in modules}
+    for module in sorted(modules, key=lambda module: -shares[module][0]):
+        without = compiled[WITHOUT + module]
+        saved, noise = shares[module]
+        within = saved <= noise
+        flagged = flagged or within
+        saved = max(saved, 0.0) if within else saved
+        print(f"{module:<20} {saved:>11.2f} {saved / full * 100 if full else 0.0:>10.1f} "
+              f"{compiled[ALL]['rss_kb'] - without['rss_kb']:>8} {noise:>9.2f}"
+              f"{'  ~' if within else ''}")
+    if flagged:
+        print("~ within the noise floor (interquartile range of the per-round savings "
+              "over the square root of --repeat): no measurable share")
+
+    validation = report.get('validation')
+    if validation:
+        total = sum(result['seconds'] for result in validation.values())
+        print(f"\n{'Media type':<20} {'docs':>6} {'mean us':>9} {'p99 us':>9} "
+              f"{'us/element':>11} {'share %':>8}")
+        for media_type, result in sorted(validation.items(),
+                                         key=lambda item: -item[1]['seconds']):
+            print(f"{media_type:<20} {result['documents']:>6} {result['mean_us']:>9.1f} "
+                  f"{result['p99_us']:>9.1f} {result['us_per_element']:>11.2f} "
+                  f"{result['seconds'] / total * 100 if total else 0.0:>8.1f}")
+
+
+def compare(baseline: Dict, current: Dict, max_regression: float) -> bool:
+    """Print compile and validation time changes; return False on a regression."""
+    ok = True
+
+    def change(label: str, old: float, new: float):
+        nonlocal ok
+        percent = (new / old - 1) * 100 if old else 0.0
+        regressed = max_regression is not None and percent > max_regression
+        ok = ok and not regressed
+        print(f"  {label:<28} {old:>9.2f} -> {new:>9.2f}  {percent:+7.1f}%"
+              f"{'   REGRESSION' if regressed else ''}")
+
+    print("\nCompared with baseline:")
+    for target, result in current['compile'].items():
+        if target in baseline.get('compile', {}) and not target.startswith(WITHOUT):
+            change(f"compile {target} (ms)", baseline['compile'][target]['compile_ms'],
+                   result['compile_ms'])
+    for media_type, result in current.get('validation', {}).items():
+        if media_type in baseline.get('validation', {}):
+            change(f"validate {media_type} (us)", baseline['validation'][media_type]['mean_us'],
+                   result['mean_us'])
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profile compiling and validating against the NFO schema modules")
+    parser.add_argument('--version', default='v2',
+                       help='Schema version to profile (default: %(default)s)')
+    parser.add_argument('--schema-dir',
+                       help='Directory containing the schema versions (default: this repository)')
+    parser.add_argument('--repeat', type=int, default=20,
+                       help='Compiles per target and validation passes per media type; '
+                            'the fastest is reported (default: %(default)s)')
+    parser.add_argument('--count', '-n', type=int, default=900,
+                       help='Documents validated, split across media types; 0 skips '
+                            'validation (default: %(default)s)')
+    parser.add_argument('--actors', type=int, default=5,
+                       help='Cast members per document (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed')
+    parser.add_argument('--output', '-o', help='Write results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                       help='Compare with an earlier results file')
+    parser.add_argument('--max-regression', type=float, metavar='PCT',
+                       help='With --compare, fail if a compile or validation time grows '
+                            'by more than PCT%%')
+    parser.add_argument('--run-target', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run_target:
+        # Child process: measure one target and report on stdout
+        print(json.dumps(measure_rss(args.run_target, args.version, args.schema_dir)))
+        return
+
+    report = {
+        'version': args.version,
+        'modules': [_module_name(url) for url in
+                    module_urls(_registry(args.schema_dir), args.version)],
+        'compile': profile_compile(args.version, args.schema_dir, args.repeat),
+    }
+    # The corpus is built from the v2 examples
+    if args.count and args.version == 'v2':
+        report['validation'] = profile_validation(args.version, args.schema_dir, args.count,
+                                                  args.actors, args.seed, args.repeat)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare(baseline, report, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+NFO Validator Benchmark
+Generates a synthetic corpus and measures NFOValidator throughput in serial,
+parallel (--jobs) and cached (--since-manifest) modes. Each mode runs in its
+own process so peak RSS is attributed correctly. Results are written as a
+JSON baseline that later runs can be compared against.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import CorpusGenerator, REPO_ROOT
+
+MODES = ('serial', 'parallel', 'cached')
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def _peak_rss_kb() -> int:
+    """Peak RSS of this process or any of its (pool worker) children."""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_mode(mode: str, corpus_dir: str, jobs: int) -> Dict:
+    """Validate the corpus once in the given mode and return its measurements."""
+    from nfo_validator import NFOValidator
+
+    paths = sorted(str(path) for path in Path(corpus_dir).rglob('*.nfo'))
+    latencies = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if mode == 'cached':
+            validator = NFOValidator(offline=True, manifest=os.path.join(tmp, 'manifest.db'))
+            # Populate the manifest; only the second, fully cached run is timed
+            for _ in validator.validate_files(paths):
+                pass
+            validator.manifest.hits = validator.manifest.misses = 0
+        else:
+            validator = NFOValidator(offline=True)
+            validator.add_hook(lambda name, phase, wall, cpu:
+                               phase == 'total' and latencies.append(wall))
+
+        invalid = 0
+        start = last = time.perf_counter()
+        for _, is_valid, _ in validator.validate_files(
+                paths, jobs=jobs if mode == 'parallel' else 1):
+            if mode == 'cached':
+                # Cache hits do not go through the timing hooks
+                now = time.perf_counter()
+                latencies.append(now - last)
+                last = now
+            if not is_valid:
+                invalid += 1
+        seconds = time.perf_counter() - start
+        validator.close()
+
+    return {
+        'files': len(paths),
+        'invalid': invalid,
+        'seconds': seconds,
+        'files_per_sec': len(paths) / seconds if seconds else 0.0,
+        'latency_p50_ms': _percentile(latencies, 0.50) * 1e3,
+        'latency_p99_ms': _percentile(latencies, 0.99) * 1e3,
+        'peak_rss_kb': _peak_rss_kb(),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(REPO_ROOT),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare(baseline: Dict, current: Dict, max_regression: float) -> bool:
+    """Print throughput/latency changes; return False if a mode regressed too far."""
+    ok = True
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for mode, result in current['results'].items():
+        old = baseline['results'].get(mode)
+        if not old:
+            continue
+        change = (result['files_per_sec'] / old['files_per_sec'] - 1) * 100
+        p99_change = ((result['latency_p99_ms'] / old['latency_p99_ms'] - 1) * 100
+                      if old['latency_p99_ms'] else 0.0)
+        regressed = max_regression is not None and change < -max_regression
+        ok = ok and not regressed
+        print(f"  {mode:<9} files/sec {change:+7.1f}%   p99 {p99_change:+7.1f}%"
+              f"{'   REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the NFO validator")
+    parser.add_argument('--count', '-n', type=int, default=2000,
+                       help='Files in the synthetic corpus (default: %(default)s)')
+    parser.add_argument('--actors', type=int, default=5,
+                       help='Cast members per document (default: %(default)s)')
+    parser.add_argument('--unicode-density', type=float, default=0.1,
+                       help='Fraction of non-ASCII words (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed')
+    parser.add_argument('--corpus', help='Use (or keep) the corpus in this directory')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                       help='Workers for parallel mode (default: %(default)s)')
+    parser.add_argument('--modes', default=','.join(MODES),
+                       help='Comma-separated modes to run (default: %(default)s)')
+    parser.add_argument('--output', '-o', help='Write results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                       help='Compare with an earlier results file')
+    parser.add_argument('--max-regression', type=float, metavar='PCT',
+                       help='With --compare, fail if files/sec drops by more than PCT%%')
+    parser.add_argument('--run-mode', choices=MODES, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run_mode:
+        # Child process: measure one mode and report on stdout
+        print(json.dumps(run_mode(args.run_mode, args.corpus, args.jobs)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus or os.path.join(tmp, 'corpus')
+        if not any(Path(corpus_dir).rglob('*.nfo')):
+            generator = CorpusGenerator(seed=args.seed, actors=args.actors,
+                                        unicode_density=args.unicode_density)
+            generator.generate(corpus_dir, args.count)
+
+        results = {}
+        for mode in args.modes.split(','):
+            output = subprocess.run(
+                [sys.executable, __file__, '--run-mode', mode, '--corpus', corpus_dir,
+                 '--jobs', str(args.jobs)],
+                capture_output=True, text=True, check=True).stdout
+            results[mode] = json.loads(output)
+            result = results[mode]
+            print(f"{mode:<9} {result['files']:>7} files  {result['files_per_sec']:>9.1f} files/sec  "
+                  f"p50 {result['latency_p50_ms']:.3f}ms  p99 {result['latency_p99_ms']:.3f}ms  "
+                  f"peak RSS {result['peak_rss_kb'] / 1024:.1f} MiB")
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'jobs': args.jobs,
+            'corpus': {'count': args.count, 'actors': args.actors,
+                       'unicode_density': args.unicode_density, 'seed': args.seed},
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare(baseline, report, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
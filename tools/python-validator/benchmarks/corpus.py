@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Synthetic NFO Corpus Generator
+Builds reproducible corpora of schema-valid NFO files for benchmarking. Each
+of the nine v2 media types is generated from its example in v2/examples:
+text fields are replaced with random words (optionally mixed with non-ASCII
+characters) and the cast list is grown to the requested size.
+"""
+
+import argparse
+import copy
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List
+from lxml import etree
+
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+EXAMPLES_DIR = REPO_ROOT / 'v2' / 'examples'
+NS = '{NFOStandard}'
+
+# media type -> (template in v2/examples, repeatable PersonType element)
+TEMPLATES = {
+    'movie': ('ExampleMovie.xml', 'actor'),
+    'tvshow': ('tvshow.xml', 'actor'),
+    'adult': ('adult.xml', 'performer'),
+    'anime': ('anime.xml', 'voiceActor'),
+    'video': ('video.xml', 'people'),
+    'music': ('music.xml', 'writer'),
+    'audiobook': ('audiobook.xml', 'voiceActor'),
+    'podcast': ('podcast_episode.xml', 'host'),
+    'musicvideo': ('musicvideo.xml', 'artist'),
+}
+MEDIA_TYPES = list(TEMPLATES)
+
+# Free-text elements that are rewritten in every document
+TEXT_FIELDS = ('title', 'plot', 'outline', 'bio')
+# PersonType/order must not exceed this
+MAX_ORDER = 1000
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+         'tempor incididunt ut labore et dolore magna aliqua night city river '
+         'shadow light story return last first empire garden winter summer').split()
+# Non-ASCII samples: Latin accents, Cyrillic, Greek, CJK, Arabic, Hebrew, emoji
+UNICODE_WORDS = ('café', 'naïve', 'Ærøskøbing', 'Москва', 'Ελλάδα', '東京', '映画',
+                 '사랑', 'مرحبا', 'שלום', 'Straße', 'žluťoučký', '🎬', '🍿')
+
+
+class CorpusGenerator:
+    """Generates NFO documents for all v2 media types from a fixed seed."""
+
+    def __init__(self, seed: int = 0, actors: int = 5, unicode_density: float = 0.1,
+                 plot_words: int = 60):
+        self.random = random.Random(seed)
+        self.actors = actors
+        self.unicode_density = unicode_density
+        self.plot_words = plot_words
+        self.templates: Dict[str, etree._ElementTree] = {
+            media_type: etree.parse(str(EXAMPLES_DIR / filename))
+            for media_type, (filename, _) in TEMPLATES.items()
+        }
+
+    def _words(self, count: int) -> str:
+        words = []
+        for _ in range(count):
+            if self.random.random() < self.unicode_density:
+                words.append(self.random.choice(UNICODE_WORDS))
+            else:
+                words.append(self.random.choice(WORDS))
+        return ' '.join(words)
+
+    def document(self, media_type: str) -> bytes:
+        """Return one serialized document of the given media type."""
+        doc = copy.deepcopy(self.templates[media_type])
+        media = doc.getroot().find(f'{NS}media/{NS}{media_type}')
+
+        for field in TEXT_FIELDS:
+            length = self.plot_words if field in ('plot', 'bio') else self.random.randint(1, 6)
+            for element in media.iter(f'{NS}{field}'):
+                element.text = self._words(length)
+
+        self._grow_cast(media, TEMPLATES[media_type][1])
+        return etree.tostring(doc, xml_declaration=True, encoding='UTF-8')
+
+    def _grow_cast(self, media: etree._Element, tag: str):
+        """Replace the cast list with self.actors copies of its first member."""
+        members = media.findall(f'{NS}{tag}')
+        if not members:
+            return
+        first = members[0]
+        parent = first.getparent()
+        position = parent.index(first)
+        for member in members:
+            parent.remove(member)
+
+        # PersonType requires at least one member where the schema has
+        # minOccurs="1"; keep one even if zero actors were asked for.
+        for index in reversed(range(max(self.actors, 1))):
+            member = copy.deepcopy(first)
+            name = member.find(f'{NS}name')
+            if name is not None:
+                name.text = self._words(2)[:100]
+            order = member.find(f'{NS}order')
+            if order is not None:
+                order.text = str(min(index + 1, MAX_ORDER))
+            parent.insert(position, member)
+
+    def generate(self, output_dir: str, count: int,
+                 media_types: List[str] = None) -> List[str]:
+        """Write count documents, cycling through media types; return their paths."""
+        media_types = media_types or MEDIA_TYPES
+        paths = []
+        for index in range(count):
+            media_type = media_types[index % len(media_types)]
+            directory = os.path.join(output_dir, media_type)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{index:07d}.nfo")
+            with open(path, 'wb') as f:
+                f.write(self.document(media_type))
+            paths.append(path)
+        return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic NFO corpus")
+    parser.add_argument('output_dir', help='Directory to write the corpus to')
+    parser.add_argument('--count', '-n', type=int, default=1000,
+                       help='Number of files (default: %(default)s)')
+    parser.add_argument('--actors', type=int, default=5,
+                       help='Cast members per document (default: %(default)s)')
+    parser.add_argument('--unicode-density', type=float, default=0.1,
+                       help='Fraction of non-ASCII words (default: %(default)s)')
+    parser.add_argument('--plot-words', type=int, default=60,
+                       help='Words per plot/bio (default: %(default)s)')
+    parser.add_argument('--media', action='append', choices=MEDIA_TYPES,
+                       help='Only generate these media types (default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(seed=args.seed, actors=args.actors,
+                                unicode_density=args.unicode_density,
+                                plot_words=args.plot_words)
+    paths = generator.generate(args.output_dir, args.count, args.media)
+    print(f"Wrote {len(paths)} files to {args.output_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
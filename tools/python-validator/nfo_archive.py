@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Archive Validation
+Validates NFO files bundled in zip or tar archives without extracting them:
+members are read into memory and validated by name as "archive!member".
+
+Zip members are read (and decompressed) by whichever process validates them,
+so with --jobs decoding happens in parallel. Compressed tar streams can only
+be read front to back, so tar members are read in the calling process and
+only their validation is fanned out to workers. An archive that cannot be
+read is reported as one invalid result under its own path.
+"""
+
+import fnmatch
+import os
+import posixpath
+import tarfile
+import threading
+import zipfile
+import zlib
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from nfo_limits import LimitExceeded, check_size
+
+try:
+    from lzma import LZMAError
+except ImportError:  # Python built without lzma
+    LZMAError = OSError
+
+
+ZIP_SUFFIXES = ('.zip',)
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ARCHIVE_SUFFIXES = ZIP_SUFFIXES + TAR_SUFFIXES
+
+# What a corrupt, truncated or misnamed archive raises while it is listed
+# or streamed (bad bz2 data and gzip headers raise OSError)
+ARCHIVE_ERRORS = (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError, zlib.error,
+                  LZMAError)
+
+# Zip archive this thread last read members of, kept open across them
+_local = threading.local()
+# Process in which close_zip is registered to run at exit
+_finalized_pid = None
+
+
+def is_archive(path: str) -> bool:
+    """Whether path names an archive this module can validate."""
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def member_name(archive: str, member: str) -> str:
+    """Name under which a member's results are reported."""
+    return f"{archive}!{posixpath.normpath(member)}"
+
+
+def _member_filter(validator, pattern: Optional[str]) -> Callable[[str], bool]:
+    """Which members to validate: those whose base name matches pattern, or
+    without one, those a scan with validator.discovery would find."""
+    if pattern is not None:
+        return lambda member: fnmatch.fnmatch(posixpath.basename(member), pattern)
+    discovery = validator.discovery
+    return lambda member: discovery.matches_relative(posixpath.normpath(member))
+
+
+def _zip_file(archive: str) -> zipfile.ZipFile:
+    zf = getattr(_local, 'zip', None)
+    if zf is None or zf.filename != archive:
+        close_zip()
+        zf = _local.zip = zipfile.ZipFile(archive)
+    global _finalized_pid
+    if _finalized_pid != os.getpid():
+        import multiprocessing.util
+        
+        # Pool workers never learn that an archive is done: one that exits
+        # cleanly closes it (a terminated one's descriptor goes with it)
+        multiprocessing.util.Finalize(None, close_zip, exitpriority=0)
+        _finalized_pid = os.getpid()
+    return zf
+
+
+def close_zip():
+    """Close the zip archive this thread has open, if any."""
+    zf = getattr(_local, 'zip', None)
+    if zf is not None:
+        zf.close()
+        _local.zip = None
+
+
+def _read_zip_member(validator, archive: str, member: str) -> bytes:
+    zf = _zip_file(archive)
+    # The uncompressed size is checked before decompressing, so a zip bomb
+    # is rejected without being inflated
+    check_size(zf.getinfo(member).file_size, validator.limits)
+    return zf.read(member)
+
+
+def _validate_zip_member(validator, name: str, archive: str, member: str,
+                         strict: bool) -> Tuple[str, bool, List[str]]:
+    is_valid, errors = validator._validate(
+        name, lambda: _read_zip_member(validator, archive, member), strict=strict)
+    return name, is_valid, errors
+
+
+def _archive_error(validator, archive: str, message: str) -> Tuple[str, bool, List[str]]:
+    return archive, False, [message]
+
+
+def _oversized_member(validator, name: str, size: int) -> Tuple[str, bool, List[str]]:
+    try:
+        check_size(size, validator.limits)
+    except LimitExceeded as e:
+        return name, False, [str(e)]
+    raise AssertionError("only called for members over the size limit")
+
+
+def _zip_calls(archive: str, strict: bool,
+               wanted: Callable[[str], bool]) -> Iterator[Tuple[Callable, tuple]]:
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            members = [info.filename for info in zf.infolist()
+                       if not info.is_dir() and wanted(info.filename)]
+    except ARCHIVE_ERRORS as e:
+        yield _archive_error, (archive, f"Archive error: {e}")
+        return
+    for member in members:
+        yield _validate_zip_member, (member_name(archive, member), archive, member, strict)
+
+
+def _tar_calls(archive: str, strict: bool, wanted: Callable[[str], bool],
+               max_bytes: int) -> Iterator[Tuple[Callable, tuple]]:
+    from nfo_validator import _validate_data
+    
+    # Stream mode: members are decompressed in order without seeking, and
+    # nothing is written to disk.
+    try:
+        with tarfile.open(archive, 'r|*') as tf:
+            for info in tf:
+                if not info.isfile() or not wanted(info.name):
+                    continue
+                name = member_name(archive, info.name)
+                if max_bytes and info.size > max_bytes:
+                    # Skipped without reading it into memory
+                    yield _oversized_member, (name, info.size)
+                    continue
+                data = tf.extractfile(info).read()
+                yield _validate_data, (name, data, strict)
+    except ARCHIVE_ERRORS as e:
+        # Members before the damage have been validated
+        yield _archive_error, (archive, f"Archive error: {e}")
+
+
+def validate_archive(validator, archive: str, strict: bool = False, jobs: int = 1,
+                     pattern: Optional[str] = None) -> Iterator[Tuple[str, bool, List[str]]]:
+    """Validate the members of archive (see NFOValidator.validate_archive)."""
+    wanted = _member_filter(validator, pattern)
+    if archive.lower().endswith(ZIP_SUFFIXES):
+        try:
+            yield from validator._execute(_zip_calls(archive, strict, wanted), jobs)
+        finally:
+            # Serially, the members were read on this thread
+            close_zip()
+        return
+
+    yield from validator._execute_read_ahead(
+        _tar_calls(archive, strict, wanted, validator.limits.max_bytes), jobs)
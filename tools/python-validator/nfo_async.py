@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Async Validation
+asyncio front end to NFOValidator for event-loop services. Files are read
+and validated on a bounded executor (threads sharing one validator, or
+worker processes with one validator each) and directories are walked on a
+thread of their own, so the event loop never waits on the disk or on lxml.
+A semaphore caps the work in flight, and cancelling a call drops its work
+if it has not started yet.
+"""
+
+import asyncio
+import itertools
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import (AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional,
+                    Tuple, Union)
+
+from nfo_validator import (NFOValidator, _init_worker, _run_in_worker, _validate_data,
+                           _validate_path)
+
+
+# Paths taken from a directory walk per trip to the walker thread
+DISCOVERY_BATCH = 256
+
+
+def _run_calls(validator: NFOValidator,
+               calls: List[Tuple[Callable, tuple]]) -> List[Tuple[str, bool, List[str]]]:
+    return [function(validator, *args) for function, args in calls]
+
+
+def _run_calls_in_worker(calls: List[Tuple[Callable, tuple]]) -> list:
+    """Process pool task: run a batch of calls with the worker's validator."""
+    return [_run_in_worker((None,) + call)[1:] for call in calls]
+
+
+def _take(iterator, count: int) -> List[str]:
+    return list(itertools.islice(iterator, count))
+
+
+async def _aiter(iterable: Iterable[str]) -> AsyncIterator[str]:
+    for item in iterable:
+        yield item
+
+
+class AsyncNFOValidator:
+    """Validates NFO documents from coroutines without blocking the event loop.
+
+    Results are those of the wrapped NFOValidator. With processes > 0,
+    documents are validated in that many worker processes, each built from
+    the validator's configuration (like `jobs`); otherwise on `threads`
+    threads sharing the validator, which validate against separate compiled
+    copies of a schema when they run at once.
+
+    At most `concurrency` jobs are in flight at once, a job being one
+    validate_file or validate_bytes call, or one batch of up to `batch_size`
+    files of validate_files; further jobs wait their turn.
+    """
+
+    def __init__(self, validator: Optional[NFOValidator] = None, concurrency: int = 0,
+                 threads: int = 0, processes: int = 0, batch_size: int = 16):
+        self._owns_validator = validator is None
+        self.validator = validator if validator is not None else NFOValidator()
+        workers = processes or threads or os.cpu_count() or 1
+        # Enough jobs to keep every worker busy while results travel back
+        self.concurrency = concurrency or 2 * workers
+        self.processes = processes
+        # Batches amortize the executor round trip over several files
+        self.batch_size = batch_size
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._walker = ThreadPoolExecutor(1, thread_name_prefix='nfo-walk')
+        if processes:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor: Executor = ProcessPoolExecutor(
+                processes, initializer=_init_worker,
+                initargs=(self.validator._worker_config(),))
+        else:
+            self._executor = ThreadPoolExecutor(workers, thread_name_prefix='nfo-validate')
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created on first use, inside the running loop (before Python 3.10
+        # semaphores bind to the loop current when they are created)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    async def _run(self, calls: List[Tuple[Callable, tuple]]) -> List[Tuple[str, bool, List[str]]]:
+        """Run (function, args) calls (see NFOValidator._execute) as one job."""
+        async with self._semaphore():
+            loop = asyncio.get_running_loop()
+            if not self.processes:
+                return await loop.run_in_executor(
+                    self._executor, partial(_run_calls, self.validator, calls))
+
+            results = await loop.run_in_executor(self._executor, _run_calls_in_worker, calls)
+        for name, _, _, timings, facts in results:
+            for phase, wall, cpu in timings:
+                self.validator._emit(name, phase, wall, cpu)
+            if self.validator.index is not None:
+                self.validator.index.add(name, facts)
+        return [result[:3] for result in results]
+
+    async def validate_file(self, filepath: str, strict: bool = False) -> Tuple[bool, List[str]]:
+        """Validate an NFO file (see NFOValidator.validate_file)."""
+        (_, is_valid, errors), = await self._run([(_validate_path, (filepath, strict))])
+        return is_valid, errors
+
+    async def validate_bytes(self, data: bytes, name: str = "<bytes>",
+                             strict: bool = False) -> Tuple[bool, List[str]]:
+        """Validate a document held in memory (see NFOValidator.validate_bytes)."""
+        (_, is_valid, errors), = await self._run([(_validate_data, (name, data, strict))])
+        return is_valid, errors
+
+    async def validate_files(self, filepaths: Union[Iterable[str], AsyncIterable[str]],
+                             strict: bool = False) -> AsyncIterator[Tuple[str, bool, List[str]]]:
+        """Validate many files, yielding (filepath, is_valid, errors) as they complete.
+
+        Results arrive in completion order. Plain iterables are consumed on
+        the event loop, so they should not block; leaving the `async for`
+        early cancels the files not yet validated.
+        """
+        if not hasattr(filepaths, '__aiter__'):
+            filepaths = _aiter(filepaths)
+        pending = set()
+        batch = []
+
+        def submit():
+            pending.add(asyncio.ensure_future(self._run(batch[:])))
+            batch.clear()
+
+        try:
+            async for filepath in filepaths:
+                batch.append((_validate_path, (str(filepath), strict)))
+                if len(batch) >= self.batch_size:
+                    submit()
+                if len(pending) >= self.concurrency:
+                    done, pending = await asyncio.wait(pending,
+                                                       return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        for result in task.result():
+                            yield result
+            if batch:
+                submit()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    for result in task.result():
+                        yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def iter_validate(self, directory: str, recursive: bool = False,
+                      pattern: Optional[str] = None,
+                      strict: bool = False) -> AsyncIterator[Tuple[str, bool, List[str]]]:
+        """`async for` over the results for an NFO directory (see NFOValidator.iter_validate).
+
+        The directory is walked on its own thread while its files are validated.
+        """
+        return self.validate_files(self._walk(directory, recursive, pattern), strict)
+
+    async def _walk(self, directory: str, recursive: bool,
+                    pattern: Optional[str]) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        files = self.validator._find_files(directory, recursive, pattern)
+        while True:
+            batch = await loop.run_in_executor(self._walker, _take, files, DISCOVERY_BATCH)
+            if not batch:
+                return
+            for filepath in batch:
+                yield filepath
+
+    def close(self):
+        """Shut down the executors (waiting for running work) and any owned validator."""
+        self._walker.shutdown()
+        self._executor.shutdown()
+        if self._owns_validator:
+            self.validator.close()
+
+    async def aclose(self):
+        """close() without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validation Result Cache
+SQLite store of validation results keyed by document content and schema,
+shared by every tool that validates NFO files (nfo-validate, the test
+runner, the migration tools). Unlike the per-library manifest it is not
+tied to paths: a document already validated anywhere, under any name, is
+answered from the cache as long as its schema (and the result-changing
+options) are the same.
+
+The database runs in WAL mode so several processes can use it at once;
+results are written in batches, and once the stored results exceed a size
+limit the least recently used ones are evicted.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from nfo_limits import is_transient
+from nfo_schemas import SchemaRegistry, schema_url_from_bytes
+
+
+class CacheStats:
+    """Lookups answered (or not) by a ResultCache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'stores': self.stores, 'evictions': self.evictions}
+
+    def format_summary(self) -> str:
+        return (f"Cache: {self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate:.0%} hit rate), {self.evictions} evicted")
+
+
+class ResultCache:
+    """Content-addressed validation results in a shared SQLite database.
+
+    A result is keyed by the SHA-256 of the document together with the
+    fingerprint of the schema it names, the validator variant and, for
+    strict results, the strict rule set, so changing any of them misses.
+    """
+
+    # Results buffered before they are written in one transaction
+    BATCH = 256
+    # Default limit on the stored results (keys and error messages)
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    # Eviction frees space down to this fraction of the limit
+    LOW_WATER = 0.9
+    # Approximate per-row overhead counted towards the limit
+    ROW_OVERHEAD = 32
+    # Stand for the document's name and base name in the location libxml2
+    # appends to parser errors, "(<name>, line N)", in stored messages
+    NAME = '\0'
+    BASENAME = '\1'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            valid INTEGER NOT NULL,
+            errors TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_used INTEGER NOT NULL,
+            facts TEXT
+        );
+        CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+        CREATE TABLE IF NOT EXISTS totals (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            entries INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            hits INTEGER NOT NULL,
+            misses INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO totals VALUES (0, 0, 0, 0, 0);
+        CREATE TRIGGER IF NOT EXISTS results_added AFTER INSERT ON results BEGIN
+            UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size;
+        END;
+        CREATE TRIGGER IF NOT EXISTS results_removed AFTER DELETE ON results BEGIN
+            UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size;
+        END;
+    """
+
+    def __init__(self, path: str, registry: SchemaRegistry, strict_fingerprint: str = '',
+                 variant: str = '', max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.registry = registry
+        self.strict_fingerprint = strict_fingerprint
+        self.variant = variant
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        # Shared by the threads of one validator
+        self._lock = threading.Lock()
+        # key -> (valid, errors json, size, facts) not yet written
+        self._pending: Dict[str, Tuple[int, str, int, Optional[str]]] = {}
+        # Keys of hits whose last use is not yet written
+        self._touched: List[str] = []
+        # key -> facts for stored results that had none, not yet written
+        self._facts: Dict[str, str] = {}
+        # Hits and misses not yet added to the shared totals
+        self._counted = (0, 0)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(results)")}
+        if 'facts' not in columns:
+            # Written before consistency facts were stored
+            self.conn.execute("ALTER TABLE results ADD COLUMN facts TEXT")
+
+    def key(self, data: bytes, strict: bool = False) -> str:
+        """Cache key of a document's result."""
+        fingerprint = self.registry.fingerprint(schema_url_from_bytes(data))
+        if self.variant:
+            fingerprint += '+' + self.variant
+        if strict:
+            fingerprint += ':' + self.strict_fingerprint
+        digest = hashlib.sha256(data)
+        digest.update(b'\0' + fingerprint.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str, name: str) -> Optional[Tuple[bool, List[str]]]:
+        """The cached result for key, or None; name is the document being validated."""
+        with self._lock:
+            row = self._pending.get(key)
+            if row is None:
+                row = self.conn.execute("SELECT valid, errors FROM results WHERE key = ?",
+                                        (key,)).fetchone()
+                if row is not None:
+                    self._touched.append(key)
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            if len(self._touched) >= self.BATCH:
+                self._flush()
+        basename = os.path.basename(name)
+        return bool(row[0]), [error.replace(self.NAME, name).replace(self.BASENAME, basename)
+                              for error in json.loads(row[1])]
+
+    def facts(self, key: str) -> Optional[str]:
+        """The library consistency facts stored with key's result, or None."""
+        with self._lock:
+            row = self._pending.get(key)
+            if row is not None:
+                return row[3]
+            if key in self._facts:
+                return self._facts[key]
+            row = self.conn.execute("SELECT facts FROM results WHERE key = ?",
+                                    (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_facts(self, key: str, facts: str):
+        """Store facts with key's result if it was stored without any."""
+        with self._lock:
+            self._facts[key] = facts
+
+    def put(self, key: str, name: str, is_valid: bool, errors: List[str],
+            facts: Optional[str] = None):
+        """Store the result of validating document name (written with the next batch).
+        
+        The location naming the document in parser errors is stored with a
+        placeholder, so a hit under another name reports that name; the name
+        is not touched anywhere else in a message. Timeouts and lost
+        workers depend on the run rather than the document and are not
+        stored.
+        facts are the document's library consistency facts in stored form,
+        or None if they were not taken.
+        """
+        if is_transient(errors):
+            return
+        encoded = json.dumps([self._mask(error, name) for error in errors])
+        with self._lock:
+            self._pending[key] = (int(is_valid), encoded,
+                                  len(key) + len(encoded) + len(facts or '') + self.ROW_OVERHEAD,
+                                  facts)
+            if len(self._pending) >= self.BATCH:
+                self._flush()
+
+    def _mask(self, error: str, name: str) -> str:
+        """error with the parser location naming the document replaced by a placeholder."""
+        error = error.replace(f"({name}, line ", f"({self.NAME}, line ")
+        basename = os.path.basename(name)
+        if basename:
+            error = error.replace(f"({basename}, line ", f"({self.BASENAME}, line ")
+        return error
+
+    def flush(self):
+        """Write buffered results and last-use times."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        now = time.time_ns()
+        hits, misses = self._counted
+        with self.conn:
+            # Content-addressed results never change, so a key another
+            # process stored in the meantime is simply kept
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO results (key, valid, errors, size, last_used, facts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, valid, errors, size, now, facts)
+                 for key, (valid, errors, size, facts) in self._pending.items()])
+            self.stats.stores += max(cursor.rowcount, 0)
+            # Results stored (here or by another process) without facts
+            # gain them
+            self.conn.executemany(
+                "UPDATE results SET facts = ? WHERE key = ? AND facts IS NULL",
+                [(facts, key) for key, (_, _, _, facts) in self._pending.items()
+                 if facts is not None] + [(facts, key) for key, facts in self._facts.items()])
+            self.conn.executemany("UPDATE results SET last_used = ? WHERE key = ?",
+                                  [(now, key) for key in self._touched])
+            self.conn.execute("UPDATE totals SET hits = hits + ?, misses = misses + ?",
+                              (self.stats.hits - hits, self.stats.misses - misses))
+            self._evict()
+        self._pending.clear()
+        self._touched.clear()
+        self._facts.clear()
+        self._counted = (self.stats.hits, self.stats.misses)
+
+    def _evict(self):
+        """Delete least recently used results while over the size limit."""
+        if not self.max_bytes:
+            return
+        target = int(self.max_bytes * self.LOW_WATER)
+        entries, stored = self.conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        if stored <= self.max_bytes:
+            return
+        while stored > target and entries:
+            # Rows are of similar size, so aim for the excess in one go
+            count = max(1, entries * (stored - target) // stored)
+            cursor = self.conn.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (count,))
+            self.stats.evictions += cursor.rowcount
+            entries, stored = self.conn.execute("SELECT entries, bytes FROM totals").fetchone()
+
+    def totals(self) -> dict:
+        """Lifetime totals of the database, over every tool that used it."""
+        self.flush()
+        entries, stored, hits, misses = self.conn.execute(
+            "SELECT entries, bytes, hits, misses FROM totals").fetchone()
+        lookups = hits + misses
+        return {'entries': entries, 'bytes': stored, 'hits': hits, 'misses': misses,
+                'hit_rate': hits / lookups if lookups else 0.0}
+
+    def close(self):
+        """Write outstanding results and close the database."""
+        self.flush()
+        self.conn.close()
+
+
+def validate_cached(validator, tasks: Iterable[Tuple[str, bool]],
+                    jobs: int = 1) -> Iterator[Tuple[int, str, bool, List[str]]]:
+    """Validate (filepath, strict) tasks on a pool, answering from validator.cache first.
+
+    Yields (tag, filepath, is_valid, errors) like NFOValidator._validate_tasks.
+    Pool workers are terminated rather than shut down, so they cannot own
+    batched writes; files are read and looked up here and only misses are
+    sent to the workers, as bytes. Hits pass through the pool as
+    _known_result calls, so they are reported in turn.
+    """
+    from nfo_validator import _known_result, _validate_data
+
+    cache = validator.cache
+    # tag -> key of each miss sent to the pool
+    keys: Dict[int, str] = {}
+    lock = threading.Lock()
+
+    def lookup(tag: int, filepath: str, data: bytes, strict: bool):
+        key = cache.key(data, strict)
+        cached = cache.get(key, filepath)
+        if cached is not None:
+            facts = (validator._cache_hit_facts(key, data, filepath)
+                     if validator.index is not None else None)
+            return _known_result, (filepath,) + cached + (facts,)
+        with lock:
+            keys[tag] = key
+        return _validate_data, (filepath, data, strict)
+
+    for tag, name, is_valid, errors in validator._execute_read_ahead(
+            validator._read_calls(tasks, lookup), jobs, tagged=True):
+        with lock:
+            key = keys.pop(tag, None)
+        if key is not None:
+            cache.put(key, name, is_valid, errors, facts=validator._facts_text(name))
+        yield tag, name, is_valid, errors
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validator Client
+Thin client for a running `nfo-validate serve` daemon. Only the standard
+library is imported, so per-call startup stays small; the daemon keeps the
+compiled schemas warm.
+"""
+
+import argparse
+import base64
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import List, Tuple
+
+
+def default_socket_path() -> str:
+    """Socket used by `nfo-validate serve` and the client when none is given."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"nfo-validator-{os.getuid()}.sock")
+
+
+class ValidatorClient:
+    """Sends validation requests to the daemon over a Unix socket.
+
+    The protocol is one JSON object per line in each direction. Requests carry
+    either an absolute "path" or base64 "data" (with an optional "name"), plus
+    "strict"; responses carry "file", "valid" and "errors".
+    """
+
+    def __init__(self, socket_path: str = None, timeout: float = 60.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(self.socket_path)
+        self.stream = self.sock.makefile('rwb')
+
+    def validate_path(self, filepath: str, strict: bool = False) -> Tuple[bool, List[str]]:
+        """Validate a file the daemon can read."""
+        return self._request({'path': os.path.abspath(filepath), 'strict': strict})
+
+    def validate_bytes(self, data: bytes, name: str = '<bytes>',
+                       strict: bool = False) -> Tuple[bool, List[str]]:
+        """Validate an in-memory document."""
+        return self._request({'data': base64.b64encode(data).decode('ascii'),
+                              'name': name, 'strict': strict})
+
+    def _request(self, message: dict) -> Tuple[bool, List[str]]:
+        self.stream.write(json.dumps(message).encode('utf-8') + b'\n')
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Validator daemon closed the connection")
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply['valid'], reply['errors']
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate NFO files using a running nfo-validate daemon",
+        epilog="Start the daemon with: nfo-validate serve"
+    )
+    parser.add_argument('files', nargs='+', help='NFO files to validate')
+    parser.add_argument('--socket', default=None,
+                       help=f'Daemon socket (default: {default_socket_path()})')
+    parser.add_argument('--strict', action='store_true',
+                       help='Enable strict validation (check recommended fields)')
+    parser.add_argument('--json', action='store_true',
+                       help='Print one JSON object per file')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Only show files with errors')
+
+    args = parser.parse_args()
+
+    try:
+        client = ValidatorClient(args.socket)
+    except OSError as e:
+        print(f"Error: Could not connect to validator daemon: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    all_valid = True
+    with client:
+        for filepath in args.files:
+            try:
+                is_valid, errors = client.validate_path(filepath, strict=args.strict)
+            except (OSError, RuntimeError, ValueError) as e:
+                # The daemon went away (ConnectionError), timed out, sent
+                # garbage or rejected the request
+                print(f"Error: {filepath}: {e}", file=sys.stderr)
+                sys.exit(2)
+            if not is_valid:
+                all_valid = False
+            if args.quiet and is_valid:
+                continue
+            if args.json:
+                print(json.dumps({"file": filepath, "valid": is_valid, "errors": errors}))
+            else:
+                print(f"{filepath}: {'VALID' if is_valid else 'INVALID'}")
+                for error in errors:
+                    print(f"  - {error}")
+
+    sys.exit(0 if all_valid else 1)
+
+
+if __name__ == "__main__":
+    main()
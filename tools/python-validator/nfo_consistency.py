@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Library Consistency
+Checks relations between the NFO files of a library, which validating each
+document on its own cannot: uniqueids shared by several movies or shows,
+episodes whose showtitle or season disagrees with the tvshow.nfo or
+season.nfo above them, duplicate episode numbers and seasons with gaps.
+
+While documents are validated, a few facts are taken from each parsed tree
+(media type, titles, season, episode, uniqueids) into a LibraryIndex; no
+tree is kept and no file is parsed again. Results answered from the result
+cache or the manifest bring the facts stored with them, and duplicates
+those of the copy validated. Once the sweep is over, check() runs every
+relational check in a single pass over the index.
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from lxml import etree
+
+
+NFO = '{NFOStandard}'
+_MEDIA = NFO + 'media'
+_UNIQUEID = NFO + 'uniqueid'
+_FIELDS = {NFO + name: name for name in
+           ('title', 'originaltitle', 'showtitle', 'season', 'episode')}
+
+SHOW_FILE = 'tvshow.nfo'
+SEASON_FILE = 'season.nfo'
+
+# Paths listed in a message before the rest are summarised as "N more"
+MAX_LISTED = 3
+
+
+class DocumentFacts(NamedTuple):
+    """What the consistency checks need to know about one document."""
+    media: str
+    title: str = ''
+    originaltitle: str = ''
+    showtitle: str = ''
+    season: Optional[int] = None
+    episode: Optional[int] = None
+    # (type, value) pairs; types are lower-cased
+    uniqueids: Tuple[Tuple[str, str], ...] = ()
+
+
+def _number(text: str) -> Optional[int]:
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+def extract_facts(doc: etree._ElementTree) -> Optional[DocumentFacts]:
+    """Facts of a parsed document, or None if it has no media element."""
+    media = doc.getroot().find(_MEDIA)
+    item = next((child for child in media if isinstance(child.tag, str)),
+                None) if media is not None else None
+    if item is None:
+        return None
+
+    fields: Dict[str, str] = {}
+    uniqueids = []
+    for child in item:
+        if child.tag == _UNIQUEID:
+            value = (child.text or '').strip()
+            if value:
+                uniqueids.append((child.get('type', '').lower(), value))
+        elif child.tag in _FIELDS:
+            fields.setdefault(_FIELDS[child.tag], (child.text or '').strip())
+
+    return DocumentFacts(etree.QName(item).localname, fields.get('title', ''),
+                         fields.get('originaltitle', ''), fields.get('showtitle', ''),
+                         _number(fields.get('season', '')), _number(fields.get('episode', '')),
+                         tuple(uniqueids))
+
+
+def encode_facts(facts: Optional[DocumentFacts]) -> str:
+    """JSON form of a document's facts (None included), stored with its result."""
+    return json.dumps(facts)
+
+
+def decode_facts(text: str) -> Optional[DocumentFacts]:
+    values = json.loads(text)
+    if values is None:
+        return None
+    *fields, uniqueids = values
+    return DocumentFacts(*fields, tuple(tuple(pair) for pair in uniqueids))
+
+
+def _listing(paths: List[str]) -> str:
+    listed = ', '.join(paths[:MAX_LISTED])
+    if len(paths) > MAX_LISTED:
+        listed += f" and {len(paths) - MAX_LISTED} more"
+    return listed
+
+
+def _ranges(numbers: List[int]) -> str:
+    """"1, 3-5" for [1, 3, 4, 5]."""
+    spans = []
+    for number in numbers:
+        if spans and number == spans[-1][1] + 1:
+            spans[-1][1] = number
+        else:
+            spans.append([number, number])
+    return ', '.join(str(a) if a == b else f"{a}-{b}" for a, b in spans)
+
+
+class LibraryIndex:
+    """Facts of the documents validated so far, keyed by name.
+
+    Names are file paths (or "archive!member"); the directory part of a name
+    places episodes below their show and season files.
+    """
+
+    def __init__(self):
+        self.facts: Dict[str, DocumentFacts] = {}
+
+    def __len__(self) -> int:
+        return len(self.facts)
+
+    def add(self, name: str, facts: Optional[DocumentFacts]):
+        """Index a document's facts; None (no media element, or not
+        parsed) drops any facts indexed under name before."""
+        if facts is not None:
+            self.facts[name] = facts
+        else:
+            self.facts.pop(name, None)
+
+    def add_tree(self, name: str, doc: etree._ElementTree):
+        self.add(name, extract_facts(doc))
+
+    def check(self) -> Iterator[Tuple[str, List[str]]]:
+        """Yield (name, violations) for every document breaking a relation, by name."""
+        violations: Dict[str, List[str]] = {}
+
+        def report(name: str, message: str):
+            violations.setdefault(name, []).append(message)
+
+        # (kind, id type, value) -> names; kinds keep e.g. a movie and an
+        # episode sharing an id from being flagged
+        ids: Dict[Tuple[str, str, str], List[str]] = {}
+        shows: Dict[str, str] = {}
+        seasons: Dict[str, str] = {}
+        episodes: List[str] = []
+        for name, facts in self.facts.items():
+            kind = facts.media
+            if facts.media == 'tvshow':
+                base = os.path.basename(name)
+                if base == SHOW_FILE:
+                    kind = 'show'
+                    shows[os.path.dirname(name)] = name
+                elif base == SEASON_FILE:
+                    kind = 'season'
+                    seasons[os.path.dirname(name)] = name
+                elif facts.episode is not None:
+                    kind = 'episode'
+                    episodes.append(name)
+            for id_type, value in facts.uniqueids:
+                ids.setdefault((kind, id_type, value), []).append(name)
+
+        # Only the (few) shared ids are sorted, so messages come out in the
+        # same order whatever order the files were validated in
+        for key in sorted(key for key, names in ids.items() if len(names) > 1):
+            _, id_type, value = key
+            names = sorted(ids[key])
+            for name in names:
+                others = [other for other in names if other != name]
+                report(name, f"Consistency error: uniqueid {id_type} '{value}' is also "
+                             f"used by {_listing(others)}")
+
+        # Directory -> nearest tvshow.nfo at or above it (None: there is none)
+        show_of: Dict[str, Optional[str]] = {}
+
+        def find_show(directory: str) -> Optional[str]:
+            walked = []
+            while directory not in show_of:
+                if directory in shows:
+                    show_of[directory] = shows[directory]
+                    break
+                walked.append(directory)
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    show_of[directory] = None
+                    break
+                directory = parent
+            for below in walked:
+                show_of[below] = show_of[directory]
+            return show_of[directory]
+
+        # (show, season) -> episode number -> names
+        numbering: Dict[Tuple[str, int], Dict[int, List[str]]] = {}
+        for name in episodes:
+            facts = self.facts[name]
+            directory = os.path.dirname(name)
+            show = find_show(directory)
+            if show is None:
+                report(name, f"Consistency warning: no {SHOW_FILE} in this or a parent directory")
+                continue
+
+            show_facts = self.facts[show]
+            titles = {show_facts.title, show_facts.originaltitle} - {''}
+            if facts.showtitle and titles and facts.showtitle not in titles:
+                report(name, f"Consistency error: showtitle '{facts.showtitle}' does not match "
+                             f"'{show_facts.title}' in {show}")
+
+            season = facts.season
+            season_file = seasons.get(directory)
+            if season_file is not None:
+                declared = self.facts[season_file].season
+                if season is None:
+                    season = declared
+                elif declared is not None and season != declared:
+                    report(name, f"Consistency error: season {season} does not match season "
+                                 f"{declared} in {season_file}")
+            if season is not None:
+                numbering.setdefault((show, season), {}).setdefault(
+                    facts.episode, []).append(name)
+
+        for (show, season), numbers in sorted(numbering.items()):
+            for episode, names in sorted(numbers.items()):
+                if len(names) > 1:
+                    names.sort()
+                    for name in names:
+                        others = [other for other in names if other != name]
+                        report(name, f"Consistency error: episode S{season:02d}E{episode:02d} "
+                                     f"is also numbered by {_listing(others)}")
+            # Specials (season 0) are rarely numbered contiguously
+            if season > 0:
+                missing = sorted(set(range(1, max(numbers) + 1)) - numbers.keys())
+                if missing:
+                    report(show, f"Consistency warning: season {season} is missing "
+                                 f"episode(s) {_ranges(missing)}")
+
+        for name in sorted(violations):
+            yield name, violations[name]
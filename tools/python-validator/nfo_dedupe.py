@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validation Deduplication
+Validates each distinct file content once. Files are read and hashed in the
+calling process; the first file with a given content (and strict flag) is
+validated and its result is reported for every other file sharing it.
+Byte-identical files name the same schema, so this is once per schema too.
+"""
+
+import hashlib
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class DuplicateStats:
+    """Duplicate groups found by validate_unique and the time they saved."""
+
+    def __init__(self):
+        self.files = 0
+        # digest -> paths with that content, in the order they were found
+        self.groups: Dict[str, List[str]] = {}
+        # digest -> validation wall time of the group's first file
+        self.seconds: Dict[str, float] = {}
+
+    @property
+    def unique(self) -> int:
+        return len(self.groups)
+
+    @property
+    def duplicates(self) -> int:
+        return self.files - self.unique
+
+    @property
+    def time_saved(self) -> float:
+        """Estimated seconds not spent validating duplicates."""
+        return sum(self.seconds.get(digest, 0.0) * (len(paths) - 1)
+                   for digest, paths in self.groups.items())
+
+    def duplicate_groups(self) -> List[List[str]]:
+        """Groups of two or more identical files, largest first."""
+        return sorted((paths for paths in self.groups.values() if len(paths) > 1),
+                      key=len, reverse=True)
+
+    def summary(self) -> dict:
+        return {
+            'files': self.files,
+            'unique': self.unique,
+            'duplicates': self.duplicates,
+            'time_saved': self.time_saved,
+            'groups': self.duplicate_groups(),
+        }
+
+    def format_summary(self) -> str:
+        groups = self.duplicate_groups()
+        return (f"Dedupe: {self.files} files, {self.unique} unique, {self.duplicates} "
+                f"duplicates in {len(groups)} groups, ~{self.time_saved:.2f}s saved")
+
+
+def _digest(data: bytes, strict: bool) -> str:
+    # Strict and non-strict results differ, so they are separate blobs
+    return hashlib.sha256(data).hexdigest() + (':strict' if strict else '')
+
+
+def validate_unique(validator, tasks: Iterable[Tuple[str, bool]], jobs: int = 1,
+                    stats: DuplicateStats = None) -> Iterator[Tuple[int, str, bool, List[str]]]:
+    """Validate (filepath, strict) tasks, validating each distinct content once.
+
+    Yields (tag, filepath, is_valid, errors) like NFOValidator._validate_tasks.
+    Duplicates found after the first file with their content has been
+    validated are answered in turn; those found while it is being validated
+    are yielded with its result. Error messages are those of that first
+    file, so any file name they mention is its name; with a consistency
+    index, duplicates are indexed with its facts.
+    """
+    from nfo_validator import _known_result, _validate_data
+
+    stats = stats if stats is not None else DuplicateStats()
+    lock = threading.Lock()
+    # digest -> (is_valid, errors, stored facts), once validated
+    done: Dict[str, Tuple[bool, List[str], Optional[str]]] = {}
+    # digest -> (tag, path) of tasks waiting for the result of the blob
+    # being validated
+    waiting: Dict[str, List[Tuple[int, str]]] = {}
+    # tag of each validated task -> its digest
+    digests: Dict[int, str] = {}
+    # Pool workers have no result cache, so it is consulted here; serially
+    # the validator consults it itself
+    cache = validator.cache if jobs != 1 else None
+    # tag of each validated task -> its cache key
+    keys: Dict[int, str] = {}
+    index = validator.index
+    # name -> wall time of its latest validation, until its result arrives
+    seconds: Dict[str, float] = {}
+
+    def lookup(tag: int, filepath: str, data: bytes, strict: bool):
+        digest = _digest(data, strict)
+        with lock:
+            stats.files += 1
+            stats.groups.setdefault(digest, []).append(filepath)
+            if digest in done:
+                return _known_result, (filepath,) + done[digest]
+            if digest in waiting:
+                waiting[digest].append((tag, filepath))
+                return None
+            key = cache.key(data, strict) if cache is not None else None
+            cached = cache.get(key, filepath) if key is not None else None
+            if cached is not None:
+                facts = (validator._cache_hit_facts(key, data, filepath)
+                         if index is not None else None)
+                done[digest] = cached + (facts,)
+                return _known_result, (filepath,) + done[digest]
+            waiting[digest] = []
+            digests[tag] = digest
+            if key is not None:
+                keys[tag] = key
+        return _validate_data, (filepath, data, strict)
+
+    def timing(name: str, phase: str, wall: float, cpu: float):
+        if phase == 'total':
+            seconds[name] = wall
+
+    validator.add_hook(timing)
+    try:
+        results = validator._execute_read_ahead(validator._read_calls(tasks, lookup), jobs,
+                                                tagged=True)
+        for tag, name, is_valid, errors in results:
+            wall = seconds.pop(name, None)
+            with lock:
+                digest = digests.pop(tag, None)
+                key = keys.pop(tag, None)
+                duplicates = []
+                if digest is not None:
+                    facts = validator._facts_text(name)
+                    done[digest] = (is_valid, errors, facts)
+                    duplicates = waiting.pop(digest)
+                    if wall is not None:
+                        stats.seconds[digest] = wall
+            yield tag, name, is_valid, errors
+            if key is not None:
+                cache.put(key, name, is_valid, errors, facts=facts)
+            for duplicate, filepath in duplicates:
+                if index is not None:
+                    index.add(filepath, index.facts.get(name))
+                yield duplicate, filepath, is_valid, errors
+    finally:
+        validator.hooks.remove(timing)
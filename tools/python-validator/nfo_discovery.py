@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+NFO Standard File Discovery
+Finds the files of a media library with os.scandir: several include and
+exclude globs are matched in one pass, directories that never hold NFO
+files (actor thumbnails, extra fanart, NAS metadata) are not descended
+into, and paths are yielded as soon as they are found. Subtrees can be
+listed on several threads, which hides latency on network filesystems.
+"""
+
+import fnmatch
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+DEFAULT_INCLUDE = ('*.nfo',)
+
+# Directory names skipped at any depth
+SKIP_DIRS = frozenset({
+    '.actors', 'extrafanart', 'extrathumbs',   # Kodi artwork
+    '.git', '@eaDir', '#recycle',              # VCS, Synology
+    '$RECYCLE.BIN', 'System Volume Information',
+})
+
+
+def _compile(patterns: Iterable[str]) -> Optional['re.Pattern']:
+    """One regex matching any of the globs, or None for no globs."""
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile('|'.join(fnmatch.translate(os.path.normcase(pattern))
+                               for pattern in patterns))
+
+
+class FileDiscovery:
+    """Finds files matching include globs and none of the exclude globs.
+
+    Globs without a slash are matched against file names; globs with a slash
+    are matched against the path relative to the root being scanned (using
+    forward slashes), e.g. "Specials/*" or "*/Season 00/*.nfo".
+    """
+
+    def __init__(self, include: Iterable[str] = DEFAULT_INCLUDE,
+                 exclude: Iterable[str] = (), skip_dirs: Iterable[str] = SKIP_DIRS,
+                 threads: int = 1):
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.skip_dirs = frozenset(skip_dirs)
+        # Directories listed concurrently; 1 walks on the calling thread
+        self.threads = threads
+        self._include = _compile(self.include)
+        self._exclude_names = _compile(p for p in self.exclude if '/' not in p)
+        self._exclude_paths = _compile(p for p in self.exclude if '/' in p)
+
+    def _wanted(self, name: str, relative: str) -> bool:
+        name = os.path.normcase(name)
+        if self._include is not None and not self._include.match(name):
+            return False
+        if self._exclude_names is not None and self._exclude_names.match(name):
+            return False
+        if self._exclude_paths is not None and self._exclude_paths.match(
+                os.path.normcase(relative.replace(os.sep, '/'))):
+            return False
+        return True
+
+    def matches(self, filepath: str, root: str) -> bool:
+        """Whether a scan of root would find filepath (a path under root)."""
+        return self.matches_relative(os.path.relpath(filepath, root))
+
+    def matches_relative(self, relative: str) -> bool:
+        """Whether a scan would find a file at this path relative to the root
+        scanned (or to the top of an archive, for its members)."""
+        relative = relative.replace(os.sep, '/')
+        *directories, name = relative.split('/')
+        if any(directory in self.skip_dirs for directory in directories):
+            return False
+        return self._wanted(name, relative)
+
+    def _scan(self, directory: str, relative: str) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """List one directory: (matching files, (subdirectory, relative) pairs)."""
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    entry_relative = f"{relative}/{entry.name}" if relative else entry.name
+                    try:
+                        # Symlinked directories are not followed, so links
+                        # cannot make the walk loop
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.skip_dirs:
+                                subdirs.append((entry.path, entry_relative))
+                        elif entry.is_file() and self._wanted(entry.name, entry_relative):
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            # Unreadable or vanished directories are skipped, as with rglob
+            pass
+        return files, subdirs
+
+    def iter_files(self, root: str, recursive: bool = True) -> Iterator[str]:
+        """Yield the matching files under root as they are found."""
+        if not recursive:
+            yield from self._scan(root, '')[0]
+        elif self.threads > 1:
+            yield from self._walk_parallel(root)
+        else:
+            stack = [(root, '')]
+            while stack:
+                files, subdirs = self._scan(*stack.pop())
+                yield from files
+                # Reversed so subdirectories are visited in listing order
+                stack.extend(reversed(subdirs))
+
+    def _walk_parallel(self, root: str) -> Iterator[str]:
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        executor = ThreadPoolExecutor(max_workers=self.threads)
+        pending = {executor.submit(self._scan, root, '')}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    pending.update(executor.submit(self._scan, *subdir) for subdir in subdirs)
+                    yield from files
+        finally:
+            # The consumer may stop early; drop the listings not yet started
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
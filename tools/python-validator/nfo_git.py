@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Git-Aware Validation
+Selects the NFO files changed since a git revision (`--git-diff REV`) so
+per-commit validation costs time in proportion to the change. Files that
+depend on a changed file are selected too: everything below a changed (or
+deleted) tvshow.nfo or season.nfo, since episodes are read in the context of
+their show and season.
+"""
+
+import os
+import subprocess
+from typing import Dict, List, Tuple
+
+from nfo_discovery import FileDiscovery
+
+
+# Files whose directory tree depends on them
+CONTAINER_FILES = frozenset({'tvshow.nfo', 'season.nfo'})
+
+
+class GitError(RuntimeError):
+    """git is unavailable, the path is not in a repository, or the revision is unknown."""
+
+
+def _git(cwd: str, *args: str) -> str:
+    try:
+        result = subprocess.run(['git', '-C', cwd] + list(args),
+                                capture_output=True, text=True, check=True)
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def changed_files(paths: List[str], rev: str) -> Tuple[List[str], List[str]]:
+    """Absolute paths of the files among or under paths changed since rev, as
+    (added or modified, deleted).
+
+    Covers commits after rev, uncommitted changes to tracked files and new
+    untracked (but not ignored) files. git is run once per work tree
+    (normally once in all) with every path as a pathspec.
+    """
+    # Top of the work tree -> symlink-free pathspecs under it (git reports
+    # symlink-free paths, so they are compared against those)
+    pathspecs: Dict[str, List[str]] = {}
+    tops: Dict[str, str] = {}
+    for path in paths:
+        directory = path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+        if directory not in tops:
+            tops[directory] = _git(directory, 'rev-parse', '--show-toplevel').strip()
+        pathspecs.setdefault(tops[directory], []).append(os.path.realpath(path))
+
+    changed, deleted = [], []
+    for top, specs in pathspecs.items():
+        # Renames are reported as a deletion and an addition
+        fields = _git(top, 'diff', '--name-status', '-z', '--no-renames',
+                      '--diff-filter=ACDMT', rev, '--', *specs).split('\0')
+        untracked = _git(top, 'ls-files', '--others', '--exclude-standard', '-z',
+                         '--', *specs).split('\0')
+        # git reports paths relative to the top of the work tree
+        for status, name in zip(fields[0::2], fields[1::2]):
+            (deleted if status == 'D' else changed).append(os.path.join(top, name))
+        changed.extend(os.path.join(top, name) for name in untracked if name)
+    return changed, deleted
+
+
+def git_tasks(discovery: FileDiscovery, paths: List[str], rev: str, recursive: bool,
+              strict: bool) -> List[Tuple[str, bool]]:
+    """(filepath, strict) tasks for the changed files among command line paths.
+
+    Like a full run, files named explicitly honour strict and files found
+    under a directory do not; they are reported relative to that directory
+    as given, as a scan of it would report them. Below a changed or deleted
+    container file, every file is selected.
+    """
+    changed, deleted = changed_files(paths, rev)
+    present = set(changed)
+    selected: Dict[str, bool] = {}
+    for path in paths:
+        root = os.path.realpath(path)
+        if not os.path.isdir(path):
+            if root in present:
+                selected[path] = strict
+            continue
+
+        for filepath in changed + deleted:
+            if not filepath.startswith(root + os.sep):
+                continue
+            if not recursive and os.path.dirname(filepath) != root:
+                continue
+            if filepath in present and discovery.matches(filepath, root):
+                selected.setdefault(os.path.join(path, os.path.relpath(filepath, root)), False)
+            if os.path.basename(filepath) in CONTAINER_FILES and recursive:
+                # Dependents are rescanned whether or not they changed (none
+                # are found if the directory went with a deleted container)
+                directory = os.path.join(path, os.path.relpath(os.path.dirname(filepath), root))
+                for dependent in discovery.iter_files(directory):
+                    selected.setdefault(dependent, False)
+
+    return list(selected.items())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validation Resource Limits
+Bounds the work a single document can cause, so one oversized, deeply nested
+or otherwise hostile NFO fails quickly instead of exhausting memory or
+stalling a batch. Violations are reported as "Resource limit exceeded: ..."
+or "Timeout: ..." errors, distinct from syntax and schema errors.
+"""
+
+import re
+import signal
+import threading
+import time
+from typing import List, NamedTuple
+
+
+class ParseLimits(NamedTuple):
+    """Per-document limits; 0 disables a limit."""
+    # Size of the serialized document in bytes
+    max_bytes: int = 16 * 1024 * 1024
+    # Nesting depth of elements (the root element is depth 1)
+    max_depth: int = 64
+    # Number of elements in the document
+    max_elements: int = 200_000
+    # Wall-clock seconds to read, parse and validate one document
+    timeout: float = 0.0
+
+    def fingerprint(self) -> str:
+        """Identifies non-default limits (empty for the defaults)."""
+        return '' if self == DEFAULT_LIMITS else ','.join(str(value) for value in self)
+
+
+DEFAULT_LIMITS = ParseLimits()
+
+
+# Documents larger than this are fed to the parser in chunks of this size,
+# so the depth, element count and time limits stop them part way; smaller
+# ones are checked once parsed, as they cannot hold enough elements to matter
+PARSE_CHUNK = 64 * 1024
+
+
+class LimitExceeded(Exception):
+    """A document exceeded a resource limit."""
+
+    def __init__(self, detail: str):
+        super().__init__(f"Resource limit exceeded: {detail}")
+
+
+class ValidationTimeout(LimitExceeded):
+    """A document took longer than the timeout."""
+
+    def __init__(self, timeout: float):
+        Exception.__init__(self, f"Timeout: validation took longer than {timeout:g}s")
+
+
+# Errors of results that depend on the run rather than the document: a
+# timeout, or a pool worker that died (see nfo_pool and _lost_in_worker)
+TRANSIENT_ERRORS = ('Timeout:', 'Unexpected error: worker process exited')
+
+
+def is_transient(errors: List[str]) -> bool:
+    """Whether a result must not be stored for later runs."""
+    return any(error.startswith(TRANSIENT_ERRORS) for error in errors)
+
+
+class Deadline:
+    """Point in time by which the current document must be finished.
+    
+    Entered as a context manager on the main thread (the command line's
+    serial mode, pool workers), a SIGALRM timer raises ValidationTimeout at
+    the deadline wherever Python code is running; a call into libxml2 is
+    interrupted when it returns. Other threads cannot receive signals and
+    rely on check() between phases and parse chunks.
+    """
+    
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires = time.perf_counter() + timeout if timeout else None
+        self._depth = 0
+        self._previous = None
+        
+    def check(self):
+        """Raise ValidationTimeout if the deadline has passed."""
+        if self.expires is not None and time.perf_counter() > self.expires:
+            raise ValidationTimeout(self.timeout)
+            
+    def __enter__(self):
+        self._depth += 1
+        if self._depth == 1 and self.expires is not None and _can_alarm():
+            self.check()
+            self._previous = signal.signal(signal.SIGALRM, self._expired)
+            signal.setitimer(signal.ITIMER_REAL, self.expires - time.perf_counter())
+        return self
+        
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._previous is not None:
+            # Stop the timer before restoring the handler it would call
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous)
+            self._previous = None
+            
+    def _expired(self, signum, frame):
+        raise ValidationTimeout(self.timeout)
+        
+        
+def _can_alarm() -> bool:
+    """Whether a SIGALRM timer can be used: on the main thread, where the
+    platform has one and the application is not already using it."""
+    return (hasattr(signal, 'setitimer')
+            and threading.current_thread() is threading.main_thread()
+            and signal.getitimer(signal.ITIMER_REAL)[0] == 0)
+
+
+def check_size(size: int, limits: ParseLimits):
+    """Raise LimitExceeded if a document of size bytes is too large."""
+    if limits.max_bytes and size > limits.max_bytes:
+        raise LimitExceeded(f"document is {size} bytes (limit {limits.max_bytes})")
+
+
+class TreeCheck:
+    """Raises LimitExceeded for parsed documents that are too deep or too large.
+    
+    The checks are XPath queries evaluated by libxml2, which is several times
+    faster than walking the tree in Python. Compiled XPath objects must not
+    be shared between threads, so each thread needs its own TreeCheck.
+    """
+    
+    def __init__(self, limits: ParseLimits):
+        from lxml import etree
+        
+        self.limits = limits
+        # An element below max_depth levels of elements (the root is level 1)
+        self._too_deep = (etree.XPath('boolean(/*' + '/*' * limits.max_depth + ')')
+                          if limits.max_depth else None)
+        self._too_many = (etree.XPath(f'count(//*) > {limits.max_elements}')
+                          if limits.max_elements else None)
+    
+    def __call__(self, root: 'etree._Element'):
+        if self._too_deep is not None and self._too_deep(root):
+            raise LimitExceeded(f"elements nested deeper than {self.limits.max_depth} levels")
+        if self._too_many is not None and self._too_many(root):
+            raise LimitExceeded(f"more than {self.limits.max_elements} elements")
+
+
+# A document type declaration, after what may precede it: a byte order
+# mark, the XML declaration, comments and processing instructions
+_DOCTYPE = re.compile(rb'(?:\xef\xbb\xbf)?(?:\s+|<\?.*?\?>|<!--.*?-->)*<!DOCTYPE', re.S)
+
+
+def check_doctype(data: bytes):
+    """Raise LimitExceeded if a document (in an ASCII-compatible encoding)
+    has a document type declaration.
+    
+    Parsers load no DTDs and expand no entities: an unexpanded entity
+    reference fails schema validation with an internal libxml2 error, and
+    libxml2 may reject the declarations themselves (an entity amplification
+    error), so such documents are rejected before parsing, saying why.
+    """
+    if _DOCTYPE.match(data):
+        raise LimitExceeded("DOCTYPE declarations are not allowed (entities are not expanded)")
+
+
+def parse_limited(data: bytes, base_url: str, options: dict, limits: ParseLimits,
+                  deadline: Deadline) -> 'etree._Element':
+    """Parse data PARSE_CHUNK bytes at a time, counting elements as they are
+    built, so a document over the depth or element limit (or the deadline)
+    is abandoned within a chunk of the violation rather than held in full.
+    
+    options are XMLParser keyword arguments. Documents with a DOCTYPE are
+    rejected (see check_doctype).
+    """
+    from lxml import etree
+    
+    check_doctype(data)
+    parser = etree.XMLPullParser(events=('start', 'end'), base_url=base_url, **options)
+    depth = elements = 0
+    for start in range(0, len(data), PARSE_CHUNK):
+        parser.feed(data[start:start + PARSE_CHUNK])
+        for event, _ in parser.read_events():
+            if event == 'end':
+                depth -= 1
+                continue
+            depth += 1
+            elements += 1
+            if limits.max_depth and depth > limits.max_depth:
+                raise LimitExceeded(f"elements nested deeper than {limits.max_depth} levels")
+            if limits.max_elements and elements > limits.max_elements:
+                raise LimitExceeded(f"more than {limits.max_elements} elements")
+        deadline.check()
+    return parser.close()
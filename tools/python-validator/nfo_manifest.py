@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validation Manifest
+Persists validation results in SQLite so repeated runs over a library only
+re-validate files (or schemas) that changed since the previous run.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+from nfo_limits import is_transient
+from nfo_schemas import SchemaRegistry, schema_url_from_bytes
+
+
+class PendingEntry(NamedTuple):
+    """What is known about a file that has to be validated again."""
+    size: int
+    mtime_ns: int
+    digest: str
+    schema_url: Optional[str]
+    schema_fingerprint: str
+
+
+class ValidationManifest:
+    """SQLite store of per-file validation results.
+
+    A file is a hit when its size and mtime are unchanged, or failing that its
+    content hash is unchanged, and the schema it names (plus the strict flag)
+    is the same as when it was last validated.
+    """
+
+    # Rows written before each commit
+    COMMIT_EVERY = 500
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            schema_url TEXT,
+            schema_fingerprint TEXT NOT NULL,
+            strict INTEGER NOT NULL,
+            valid INTEGER NOT NULL,
+            errors TEXT NOT NULL,
+            facts TEXT
+        )
+    """
+
+    def __init__(self, path: str, registry: SchemaRegistry, strict_fingerprint: str = '',
+                 variant: str = ''):
+        self.path = path
+        self.registry = registry
+        # Identifies the strict-mode rule set, so changing it invalidates
+        # strict results
+        self.strict_fingerprint = strict_fingerprint
+        # Identifies validator options that change every result (such as
+        # reporting all schema errors), so switching them invalidates results
+        self.variant = variant
+        self.hits = 0
+        self.misses = 0
+        self._pending_writes = 0
+        # Lookups run on whichever thread hands out work, records on the
+        # thread collecting results
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(self.SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(results)")}
+        if 'facts' not in columns:
+            # Written before consistency facts were stored
+            self.conn.execute("ALTER TABLE results ADD COLUMN facts TEXT")
+
+    def lookup(self, filepath: str, strict: bool = False, max_bytes: int = 0
+               ) -> Tuple[Optional[Tuple[bool, List[str], Optional[str]]],
+                          Optional[PendingEntry], Optional[bytes]]:
+        """Return (cached result, None, None) on a hit or (None, pending entry,
+        content) on a miss.
+
+        A cached result is (is_valid, errors, facts), facts being what was
+        passed to record().
+        The content read to hash the file is returned so it need not be read
+        again to validate it. The pending entry must be handed back to
+        record() once the file has been validated. Files that cannot be read,
+        or are larger than max_bytes (if set), are misses without an entry or
+        content.
+        """
+        key = os.path.abspath(filepath)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, digest, schema_url, schema_fingerprint, strict, valid, "
+                "errors, facts FROM results WHERE path = ?", (key,)).fetchone()
+
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            self.misses += 1
+            return None, None, None
+
+        if row is not None:
+            (size, mtime_ns, digest, schema_url, schema_fingerprint, row_strict, valid, errors,
+             facts) = row
+            same_schema = (bool(row_strict) == strict and
+                           self._fingerprint(schema_url, strict) == schema_fingerprint)
+            if same_schema and size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+                self.hits += 1
+                return (bool(valid), json.loads(errors), facts), None, None
+
+        if max_bytes and stat.st_size > max_bytes:
+            self.misses += 1
+            return None, None, None
+        try:
+            with open(filepath, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None, None, None
+
+        new_digest = hashlib.sha256(data).hexdigest()
+        if row is not None and same_schema and new_digest == digest:
+            # Touched but not modified: refresh the stat so the next run
+            # does not have to read the file.
+            with self._lock:
+                self.conn.execute("UPDATE results SET size = ?, mtime_ns = ? WHERE path = ?",
+                                  (stat.st_size, stat.st_mtime_ns, key))
+                self._written()
+            self.hits += 1
+            return (bool(valid), json.loads(errors), facts), None, None
+
+        self.misses += 1
+        schema_url = schema_url_from_bytes(data)
+        return None, PendingEntry(stat.st_size, stat.st_mtime_ns, new_digest, schema_url,
+                                  self._fingerprint(schema_url, strict)), data
+
+    def _fingerprint(self, schema_url: Optional[str], strict: bool) -> str:
+        fingerprint = self.registry.fingerprint(schema_url)
+        if self.variant:
+            fingerprint += '+' + self.variant
+        if strict:
+            fingerprint += ':' + self.strict_fingerprint
+        return fingerprint
+
+    def record(self, filepath: str, entry: PendingEntry, strict: bool,
+               is_valid: bool, errors: List[str], facts: Optional[str] = None):
+        """Store the result of validating a file returned as a miss by lookup().
+
+        facts are the file's library consistency facts in stored form, or
+        None if they were not taken. Timeouts and lost workers are not
+        stored, so the file is validated again next time.
+        """
+        if is_transient(errors):
+            return
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (path, size, mtime_ns, digest, schema_url, "
+                "schema_fingerprint, strict, valid, errors, facts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(filepath), entry.size, entry.mtime_ns, entry.digest,
+                 entry.schema_url, entry.schema_fingerprint, int(strict), int(is_valid),
+                 json.dumps(errors), facts))
+            self._written()
+
+    def set_facts(self, filepath: str, facts: str):
+        """Store facts with a file's result (see record()) that has none."""
+        with self._lock:
+            self.conn.execute("UPDATE results SET facts = ? WHERE path = ?",
+                              (facts, os.path.abspath(filepath)))
+            self._written()
+
+    def _written(self):
+        self._pending_writes += 1
+        if self._pending_writes >= self.COMMIT_EVERY:
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def close(self):
+        """Commit outstanding results and close the database."""
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
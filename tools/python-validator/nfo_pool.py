@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Supervised Worker Pool
+A process pool for validating with a timeout. A document can stall inside a
+single libxml2 call (a pathological xs:pattern, say), where neither deadline
+checks nor the workers' SIGALRM handler can run, and multiprocessing.Pool
+would wait for it forever. Here the parent tracks how long each worker has
+spent on its current call and kills and replaces one that overruns; the call
+is reported lost and the rest of the worker's chunk goes to the next worker.
+"""
+
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator, List
+
+from nfo_limits import ValidationTimeout
+
+# Seconds a worker may overrun the timeout before it is killed; its own
+# alarm ends calls stalled in Python code before then
+KILL_GRACE = 1.0
+
+
+class _Worker:
+    """One worker process and the calls sent to it that are not answered yet."""
+
+    def __init__(self, initializer: Callable, initargs: tuple, run: Callable):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve,
+                                               args=(child, initializer, initargs, run),
+                                               daemon=True)
+        self.process.start()
+        child.close()
+        self.calls = deque()
+        # Set once the worker is initialized; from then on, when the call at
+        # the head of calls started
+        self.started = None
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def _serve(conn, initializer: Callable, initargs: tuple, run: Callable):
+    """Worker process: initialize, say so, then answer chunks of calls one call at a time."""
+    initializer(*initargs)
+    conn.send(None)
+    while True:
+        try:
+            chunk = conn.recv()
+        except EOFError:
+            return
+        for call in chunk:
+            conn.send(run(call))
+
+
+def imap_supervised(run: Callable[[Any], Any], calls: Iterable, jobs: int,
+                    initializer: Callable, initargs: tuple, timeout: float,
+                    lost: Callable[[Any, Exception], Any], chunksize: int = 1) -> Iterator:
+    """Yield run(call) for every call, computed on jobs worker processes, in
+    completion order.
+
+    Workers are started with initializer(*initargs) and handed chunksize
+    calls whenever they are idle; a busy worker is never written to, so a
+    stalled one cannot block this process. A call still running timeout +
+    KILL_GRACE seconds after it started, or whose worker dies, yields
+    lost(call, error) instead. Leaving the iteration early kills the workers.
+    """
+    calls = iter(calls)
+    requeued = deque()
+    limit = timeout + KILL_GRACE
+    workers: List[_Worker] = []
+
+    def take() -> list:
+        chunk = []
+        while requeued and len(chunk) < chunksize:
+            chunk.append(requeued.popleft())
+        for call in calls if len(chunk) < chunksize else ():
+            chunk.append(call)
+            if len(chunk) == chunksize:
+                break
+        return chunk
+
+    def replace(worker: _Worker, error: Exception):
+        worker.kill()
+        call = worker.calls.popleft()
+        # The rest of its chunk goes first to whichever worker is idle next
+        requeued.extendleft(reversed(worker.calls))
+        workers[workers.index(worker)] = _Worker(initializer, initargs, run)
+        return lost(call, error)
+
+    try:
+        workers.extend(_Worker(initializer, initargs, run) for _ in range(jobs))
+        while True:
+            for worker in workers:
+                if not worker.calls:
+                    chunk = take()
+                    if chunk:
+                        worker.conn.send(chunk)
+                        worker.calls.extend(chunk)
+                        if worker.started is not None:
+                            worker.started = time.perf_counter()
+            busy = [worker for worker in workers if worker.calls]
+            if not busy:
+                return
+
+            deadlines = [worker.started + limit for worker in busy if worker.started is not None]
+            ready = wait([worker.conn for worker in busy],
+                         timeout=max(min(deadlines) - time.perf_counter(), 0)
+                         if deadlines else None)
+            for worker in busy:
+                if worker.conn not in ready:
+                    continue
+                try:
+                    result = worker.conn.recv()
+                except EOFError:
+                    worker.process.join()
+                    yield replace(worker, RuntimeError(
+                        f"worker process exited with code {worker.process.exitcode}"))
+                    continue
+                worker.started = time.perf_counter()
+                # None only announces that the worker is initialized
+                if result is not None:
+                    worker.calls.popleft()
+                    yield result
+
+            now = time.perf_counter()
+            for worker in busy:
+                # A worker whose answer is waiting was held up by the
+                # consumer of this generator, not by its call
+                if (worker in workers and worker.calls and worker.started is not None
+                        and now - worker.started > limit and not worker.conn.poll()):
+                    yield replace(worker, ValidationTimeout(timeout))
+    finally:
+        for worker in workers:
+            worker.kill()
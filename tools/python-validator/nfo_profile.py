@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validation Profiler
+Collects per-phase wall/CPU timings reported by NFOValidator hooks (see
+NFOValidator.add_hook) and summarises them as histograms plus the slowest
+files.
+"""
+
+import heapq
+import itertools
+import json
+from typing import Dict, List
+
+
+PHASES = ('read', 'parse', 'schema_load', 'validate', 'strict', 'total')
+
+
+class _PhaseStats:
+    """Running totals and a power-of-two microsecond histogram for one phase."""
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max = 0.0
+        # Bucket i counts durations below 2**i microseconds (and at least
+        # 2**(i-1)); the last bucket also takes anything longer.
+        self.histogram = [0] * self.BUCKETS
+
+    def add(self, wall: float, cpu: float):
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.max = max(self.max, wall)
+        bucket = min(int(wall * 1e6).bit_length(), self.BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound, in seconds, of the bucket holding the given percentile."""
+        threshold = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= threshold:
+                return min((2 ** bucket) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'wall_total': self.wall,
+            'cpu_total': self.cpu,
+            'wall_mean': self.wall / self.count if self.count else 0.0,
+            'wall_p50': self.percentile(0.50),
+            'wall_p99': self.percentile(0.99),
+            'wall_max': self.max,
+            'histogram_us': {f"<{2 ** bucket}": count
+                             for bucket, count in enumerate(self.histogram) if count},
+        }
+
+
+class PhaseProfiler:
+    """Validator hook aggregating phase timings and tracking the slowest files.
+
+        profiler = PhaseProfiler()
+        validator.add_hook(profiler)
+        ...
+        print(profiler.format_summary())
+    """
+
+    def __init__(self, slowest: int = 10):
+        self.slowest = slowest
+        self.phases: Dict[str, _PhaseStats] = {}
+        # name -> {phase: wall} for documents still being validated
+        self._current: Dict[str, Dict[str, float]] = {}
+        # min-heap of (total wall, tiebreak, name, phases)
+        self._slowest: List[tuple] = []
+        self._counter = itertools.count()
+
+    def __call__(self, name: str, phase: str, wall: float, cpu: float):
+        self.phases.setdefault(phase, _PhaseStats()).add(wall, cpu)
+        if phase != 'total':
+            # Per-version and compile phases are only aggregated
+            if phase in PHASES:
+                self._current.setdefault(name, {})[phase] = wall
+            return
+
+        entry = (wall, next(self._counter), name, self._current.pop(name, {}))
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, entry)
+        elif wall > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def summary(self) -> dict:
+        ordered = [phase for phase in PHASES if phase in self.phases]
+        ordered += sorted(set(self.phases) - set(PHASES))
+        return {
+            'phases': {phase: self.phases[phase].summary() for phase in ordered},
+            'slowest': [{'file': name, 'wall': wall, 'phases': phases}
+                        for wall, _, name, phases in sorted(self._slowest, reverse=True)],
+        }
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        lines = [f"\n{'='*60}", "Validation profile", f"{'='*60}",
+                 f"{'Phase':<12} {'Count':>8} {'Wall (s)':>10} {'CPU (s)':>10} "
+                 f"{'Mean (ms)':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}"]
+        for phase, stats in summary['phases'].items():
+            lines.append(f"{phase:<12} {stats['count']:>8} {stats['wall_total']:>10.3f} "
+                         f"{stats['cpu_total']:>10.3f} {stats['wall_mean'] * 1e3:>10.3f} "
+                         f"{stats['wall_p50'] * 1e3:>10.3f} {stats['wall_p99'] * 1e3:>10.3f}")
+        if summary['slowest']:
+            lines.append(f"\nSlowest {len(summary['slowest'])} files:")
+            for entry in summary['slowest']:
+                phases = ', '.join(f"{phase} {wall * 1e3:.2f}ms"
+                                   for phase, wall in entry['phases'].items())
+                lines.append(f"  {entry['wall'] * 1e3:9.2f}ms  {entry['file']}  ({phases})")
+        return '\n'.join(lines)
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validation Reports
+JUnit XML and SARIF report writers for CI dashboards. Each result is written
+to the report file as soon as it arrives, so memory use does not grow with
+the number of files. Writers are also validator hooks, which is how they
+learn each file's validation time, including in parallel mode.
+"""
+
+import abc
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Tuple
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+
+TOOL_NAME = "nfo-validate"
+TOOL_URI = "https://github.com/Biztactix/NFOStandard"
+
+# Characters XML 1.0 cannot represent, even escaped
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# The last "line N" in an error message is the document line it refers to
+_LINE = re.compile(r'\bline (\d+)')
+
+# (rule id, name, error message prefix, level)
+RULES: Tuple[Tuple[str, str, str, str], ...] = (
+    ('NFO001', 'xml-syntax', 'XML syntax error:', 'error'),
+    ('NFO002', 'schema-location', 'No xsi:schemaLocation', 'error'),
+    ('NFO002', 'schema-location', 'Invalid xsi:schemaLocation', 'error'),
+    ('NFO003', 'schema-validation', 'Schema validation error:', 'error'),
+    ('NFO004', 'recommended-field', 'Warning:', 'warning'),
+    ('NFO006', 'resource-limit', 'Resource limit exceeded:', 'error'),
+    ('NFO006', 'resource-limit', 'Timeout:', 'error'),
+    ('NFO007', 'library-consistency', 'Consistency error:', 'error'),
+    ('NFO007', 'library-consistency', 'Consistency warning:', 'warning'),
+    ('NFO005', 'validation-error', '', 'error'),
+)
+
+
+def classify(error: str) -> Tuple[str, str, str]:
+    """(rule id, rule name, level) of an error message."""
+    for rule_id, name, prefix, level in RULES:
+        if error.startswith(prefix):
+            return rule_id, name, level
+    raise AssertionError("the last rule matches every message")
+
+
+def error_line(error: str) -> Optional[int]:
+    """Document line an error message refers to, if it names one."""
+    lines = _LINE.findall(error)
+    return int(lines[-1]) if lines else None
+
+
+def _xml_text(value: str) -> str:
+    return _INVALID_XML_CHARS.sub('\ufffd', value)
+
+
+class ReportWriter(abc.ABC):
+    """Base class: streams results to path (a regular file) as they are added.
+
+    Register the writer as a validator hook before validating so it can
+    report each file's 'total' time; results without a timing (manifest
+    hits, duplicates) are reported with a time of 0.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stream: TextIO = open(path, 'w', encoding='utf-8')
+        self.files = 0
+        self.failures = 0
+        self.seconds = 0.0
+        # name -> validation wall time of results not yet added
+        self._timings: Dict[str, float] = {}
+        self._start()
+
+    def __call__(self, name: str, phase: str, wall: float, cpu: float):
+        if phase == 'total':
+            self._timings[name] = wall
+
+    def add(self, filepath: str, is_valid: bool, errors: List[str]):
+        seconds = self._timings.pop(filepath, 0.0)
+        self.files += 1
+        self.failures += not is_valid
+        self.seconds += seconds
+        self._write(filepath, is_valid, errors, seconds)
+
+    def close(self):
+        self._finish()
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @abc.abstractmethod
+    def _start(self):
+        """Write what precedes the results."""
+
+    @abc.abstractmethod
+    def _write(self, filepath: str, is_valid: bool, errors: List[str], seconds: float):
+        """Write one file's result."""
+
+    @abc.abstractmethod
+    def _finish(self):
+        """Write what follows the results, once the totals are known."""
+
+
+class JUnitWriter(ReportWriter):
+    """JUnit XML: one <testcase> per file, with a <failure> if it is invalid.
+
+    Totals are only known at the end, so the <testsuite> start tag is written
+    with padding that close() overwrites with the counts.
+    """
+
+    # Room for ' tests="..." failures="..." errors="0" time="..."'
+    TOTALS_WIDTH = 96
+
+    def _start(self):
+        self.stream.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+        self.stream.write(f'  <testsuite name={quoteattr(TOOL_NAME)}')
+        self._totals_offset = self.stream.tell()
+        self.stream.write(' ' * self.TOTALS_WIDTH + '>\n')
+
+    def _write(self, filepath: str, is_valid: bool, errors: List[str], seconds: float):
+        name = quoteattr(_xml_text(filepath))
+        self.stream.write(f'    <testcase classname="nfo" name={name} file={name} '
+                          f'time="{seconds:.6f}"')
+        if is_valid:
+            self.stream.write('/>\n')
+            return
+        first = errors[0] if errors else 'Invalid'
+        message = quoteattr(_xml_text(first))
+        details = escape(_xml_text('\n'.join(errors)))
+        self.stream.write(f'>\n      <failure message={message} type="{classify(first)[1]}">'
+                          f'{details}</failure>\n    </testcase>\n')
+
+    def _finish(self):
+        self.stream.write('  </testsuite>\n</testsuites>\n')
+        totals = (f' tests="{self.files}" failures="{self.failures}" errors="0" '
+                  f'time="{self.seconds:.3f}"')
+        self.stream.seek(self._totals_offset)
+        self.stream.write(totals.ljust(self.TOTALS_WIDTH))
+
+
+class SarifWriter(ReportWriter):
+    """SARIF 2.1.0: one result per error, and a "pass" result per valid file.
+
+    Every result carries the file's validation time in its properties.
+    """
+
+    SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+    # Base that relative paths are reported against: the working directory
+    SRCROOT = '%SRCROOT%'
+
+    def _start(self):
+        rules = []
+        for rule_id, name, _, level in RULES:
+            if rule_id not in (rule['id'] for rule in rules):
+                rules.append({'id': rule_id, 'name': name,
+                              'defaultConfiguration': {'level': level}})
+        header = json.dumps({
+            'version': '2.1.0',
+            '$schema': self.SCHEMA,
+            'runs': [{'tool': {'driver': {'name': TOOL_NAME, 'informationUri': TOOL_URI,
+                                          'rules': rules}},
+                      'originalUriBaseIds': {self.SRCROOT: {'uri': Path.cwd().as_uri() + '/'}},
+                      'results': []}],
+        })
+        # Leave the results array open; results are appended as they arrive
+        self.stream.write(header[:header.rindex('[]') + 1] + '\n')
+        self._separator = ''
+
+    def _artifact(self, filepath: str) -> dict:
+        """artifactLocation of a reported path; URIs must be percent-encoded."""
+        if os.path.isabs(filepath):
+            return {'uri': Path(filepath).as_uri()}
+        return {'uri': quote(filepath.replace(os.sep, '/')), 'uriBaseId': self.SRCROOT}
+
+    def _result(self, filepath: str, seconds: float, **fields) -> str:
+        location = {'physicalLocation': {'artifactLocation': self._artifact(filepath)}}
+        line = fields.pop('line', None)
+        if line is not None:
+            location['physicalLocation']['region'] = {'startLine': line}
+        result = dict(fields, locations=[location],
+                      properties={'validationSeconds': round(seconds, 6)})
+        return json.dumps(result, ensure_ascii=False)
+
+    def _write(self, filepath: str, is_valid: bool, errors: List[str], seconds: float):
+        if is_valid:
+            results = [self._result(filepath, seconds, kind='pass', level='none',
+                                    message={'text': 'Valid'})]
+        else:
+            results = []
+            for error in errors or ['Invalid']:
+                rule_id, _, level = classify(error)
+                results.append(self._result(filepath, seconds, ruleId=rule_id, level=level,
+                                            message={'text': error}, line=error_line(error)))
+        for result in results:
+            self.stream.write(f'{self._separator}{result}')
+            self._separator = ',\n'
+
+    def _finish(self):
+        invocation = json.dumps([{'executionSuccessful': True,
+                                  'properties': {'files': self.files,
+                                                 'invalid': self.failures,
+                                                 'validationSeconds': round(self.seconds, 6)}}])
+        self.stream.write(f'\n], "invocations": {invocation}}}]}}\n')
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Strict Rules
+Rule engine behind the validator's strict mode. Rules are declared once,
+compiled to lxml XPath objects, and evaluated against the media element of
+each document.
+
+Rule files are JSON documents of the form:
+
+    {"rules": [
+        {"media": "movie", "field": "studio"},
+        {"media": "movie", "xpath": "nfo:banner[@type='poster']",
+         "message": "Warning: Movie has no poster artwork"}
+    ]}
+
+A "field" rule passes when the media element has a descendant of that name
+(which must be a valid XML name without a prefix).
+An "xpath" rule is evaluated with the media element as context node (the
+NFO Standard namespace is bound to the prefix "nfo") and passes when the
+result is true or non-empty.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional
+from lxml import etree
+
+
+NFO_NAMESPACE = "NFOStandard"
+NAMESPACES = {'nfo': NFO_NAMESPACE}
+
+# Fields strict mode expects for each media type, in reporting order
+RECOMMENDED_FIELDS = {
+    'movie': ['year', 'runtime', 'genre', 'director', 'actor', 'plot'],
+    'tvshow': ['year', 'genre', 'actor', 'plot', 'season', 'episode'],
+    'music': ['artist', 'album', 'year', 'genre'],
+    'audiobook': ['author', 'narrator', 'publisher', 'year'],
+    'podcast': ['author', 'category', 'pubDate', 'duration']
+}
+
+
+class RuleError(ValueError):
+    """A rule file cannot be read, or a rule in it is malformed."""
+
+
+def default_rules() -> List[dict]:
+    """The built-in rule set: one field rule per recommended field."""
+    return [{'media': media_type, 'field': field}
+            for media_type, fields in RECOMMENDED_FIELDS.items()
+            for field in fields]
+
+
+def _is_name(name: str) -> bool:
+    try:
+        etree.QName(name)
+    except ValueError:
+        return False
+    return True
+
+
+class _MediaRules:
+    """Compiled rules for one media type."""
+
+    def __init__(self, media_type: str):
+        self.media_type = media_type
+        self.fields: List[str] = []
+        self.field_query: Optional[etree.XPath] = None
+        self.xpath_rules: List[tuple] = []
+
+    def compile(self):
+        # All field rules share a single descendant walk that returns the
+        # elements whose names are of interest.
+        if self.fields:
+            names = ' or '.join(f"local-name()='{field}'" for field in self.fields)
+            self.field_query = etree.XPath(
+                f"descendant::*[namespace-uri()='{NFO_NAMESPACE}' and ({names})]")
+
+    def check(self, element: etree._Element) -> List[str]:
+        warnings = []
+        if self.field_query is not None:
+            present = {etree.QName(found).localname for found in self.field_query(element)}
+            for field in self.fields:
+                if field not in present:
+                    warnings.append(f"Warning: Recommended field '{field}' is missing "
+                                    f"for {self.media_type}")
+        for query, message in self.xpath_rules:
+            if not query(element):
+                warnings.append(message)
+        return warnings
+
+
+class RuleEngine:
+    """Compiled strict-mode rules."""
+
+    MEDIA_QUERY = etree.XPath("/nfo:root/nfo:media/*", namespaces=NAMESPACES)
+
+    def __init__(self, rules: Optional[List[dict]] = None):
+        if rules is None:
+            rules = default_rules()
+        self.rules = rules
+        self._by_media: Dict[str, _MediaRules] = {}
+
+        for rule in rules:
+            if not isinstance(rule, dict) or not isinstance(rule.get('media'), str):
+                raise RuleError(f"Rule needs a 'media' type: {rule}")
+            media_type = rule['media']
+            compiled = self._by_media.setdefault(media_type, _MediaRules(media_type))
+            if 'field' in rule:
+                field = rule['field']
+                # Field names are spliced into the shared field query
+                if not isinstance(field, str) or ':' in field or not _is_name(field):
+                    raise RuleError(f"Rule field is not an XML element name: {rule}")
+                if field not in compiled.fields:
+                    compiled.fields.append(field)
+            elif 'xpath' in rule:
+                message = rule.get('message') or (
+                    f"Warning: Rule '{rule['xpath']}' failed for {media_type}")
+                try:
+                    query = etree.XPath(rule['xpath'], namespaces=NAMESPACES)
+                except (etree.XPathSyntaxError, TypeError) as e:
+                    raise RuleError(f"Rule xpath does not compile ({e}): {rule}")
+                compiled.xpath_rules.append((query, message))
+            else:
+                raise RuleError(f"Rule needs a 'field' or 'xpath': {rule}")
+
+        for compiled in self._by_media.values():
+            compiled.compile()
+
+    @classmethod
+    def from_files(cls, paths: List[str], include_defaults: bool = True) -> 'RuleEngine':
+        """Build an engine from the built-in rules plus JSON rule files.
+        
+        Raises RuleError if a file cannot be read or holds a malformed rule.
+        """
+        rules = default_rules() if include_defaults else []
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    file_rules = json.load(f)['rules']
+            except (OSError, ValueError) as e:
+                raise RuleError(f"{path}: {e}")
+            except (KeyError, TypeError):
+                raise RuleError(f"{path}: expected an object with a \"rules\" list")
+            if not isinstance(file_rules, list):
+                raise RuleError(f"{path}: expected an object with a \"rules\" list")
+            rules.extend(file_rules)
+        return cls(rules)
+
+    def fingerprint(self) -> str:
+        """Digest identifying this rule set (for caching strict results)."""
+        return hashlib.sha256(json.dumps(self.rules, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def check(self, doc: etree._ElementTree) -> List[str]:
+        """Return the warnings for a document."""
+        warnings = []
+        for element in self.MEDIA_QUERY(doc):
+            compiled = self._by_media.get(etree.QName(element).localname)
+            if compiled is not None:
+                warnings.extend(compiled.check(element))
+        return warnings
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Schema Registry
+Maps the published schemaLocation URLs to the XSD files shipped with the
+NFO Standard so schemas (and their xs:include chains) compile without network
+access.
+
+Modules only needed off the common offline path (requests, hashlib,
+concurrent.futures), and lxml, needed only once documents are validated,
+are imported where they are used to keep startup fast.
+"""
+
+import os
+import sys
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+XSI_SCHEMA_LOCATION = '{http://www.w3.org/2001/XMLSchema-instance}schemaLocation'
+
+# lxml swaps libxml2's process-wide document loader in and out around a
+# schema compile, so compiles on several threads must not overlap (one would
+# restore the default loader while another still resolves includes)
+_COMPILE_LOCK = threading.Lock()
+
+
+def parse_schema_location(schema_location: str, namespace: Optional[str]) -> Optional[str]:
+    """Pick the schema URL for namespace from an xsi:schemaLocation value.
+    
+    The value is a list of (namespace, URL) pairs; if none matches the
+    document's namespace the first URL is used. Returns None when the value
+    holds no URL at all.
+    """
+    parts = schema_location.split()
+    if len(parts) < 2:
+        return None
+    for index in range(0, len(parts) - 1, 2):
+        if parts[index] == namespace:
+            return parts[index + 1]
+    return parts[1]
+
+
+def schema_url_from_bytes(data: bytes) -> Optional[str]:
+    """Return the schema URL named by a document's xsi:schemaLocation.
+    
+    Only the root start tag is parsed, so this is cheap even for large files.
+    """
+    from lxml import etree
+    
+    try:
+        for _, element in etree.iterparse(BytesIO(data), events=('start',)):
+            return parse_schema_location(element.get(XSI_SCHEMA_LOCATION) or '',
+                                         etree.QName(element).namespace)
+    except etree.XMLSyntaxError:
+        pass
+    return None
+
+
+def _fetch(url: str) -> bytes:
+    """Download a schema that has no local copy."""
+    import requests
+    
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    return response.content
+
+
+class SchemaRegistry:
+    """Resolves NFO Standard schema URLs to local files."""
+
+    SCHEMA_HOST = "xsd.nfostandard.com"
+    # Published schema versions, each laid out as <version>/main.xsd and
+    # <version>/Schemas/*.xsd under a schema root.
+    VERSIONS = ('v1', 'v2')
+    # Unversioned URLs predate the v1/ prefix and serve the v1 schemas.
+    LEGACY_PREFIX = 'v1'
+
+    def __init__(self, roots: Optional[List[str]] = None):
+        if roots is None:
+            roots = self.default_roots()
+        self.roots = [str(root) for root in roots]
+        self._paths: Dict[str, Optional[str]] = {}
+        self._fingerprints: Dict[str, str] = {}
+
+    @staticmethod
+    def default_roots() -> List[str]:
+        """Schema roots searched when none are given explicitly."""
+        roots = []
+
+        # A source checkout: tools/python-validator/../../v2/main.xsd
+        checkout = Path(__file__).resolve().parent.parent.parent
+        if (checkout / 'v2' / 'main.xsd').is_file():
+            roots.append(str(checkout))
+
+        # An installed package (see data_files in setup.py)
+        installed = Path(sys.prefix) / 'share' / 'nfostandard'
+        if installed.is_dir():
+            roots.append(str(installed))
+
+        return roots
+
+    def known_urls(self) -> List[str]:
+        """All schema URLs that have a local copy."""
+        urls = []
+        for version in self.VERSIONS:
+            for root in self.roots:
+                version_dir = Path(root) / version
+                if not (version_dir / 'main.xsd').is_file():
+                    continue
+                urls.append(f"https://{self.SCHEMA_HOST}/{version}/main.xsd")
+                for xsd in sorted((version_dir / 'Schemas').glob('*.xsd')):
+                    urls.append(f"https://{self.SCHEMA_HOST}/{version}/Schemas/{xsd.name}")
+                break
+        return urls
+
+    def path_for(self, schema_url: str) -> Optional[str]:
+        """Return the local file for a schema URL, or None if unknown."""
+        if schema_url not in self._paths:
+            self._paths[schema_url] = self._find_path(schema_url)
+        return self._paths[schema_url]
+
+    def _relative_path(self, schema_url: str) -> Optional[str]:
+        """Path of a schema URL below a schema root, e.g. v2/Schemas/movie.xsd."""
+        parsed = urlparse(schema_url)
+        if parsed.scheme in ('http', 'https') and parsed.netloc != self.SCHEMA_HOST:
+            return None
+
+        relative = parsed.path.lstrip('/') if parsed.scheme else schema_url
+        if relative.split('/', 1)[0] not in self.VERSIONS:
+            relative = f"{self.LEGACY_PREFIX}/{relative}"
+        return relative
+
+    def version_of(self, schema_url: str) -> str:
+        """Schema version a URL belongs to ('v1', 'v2'), or 'remote'."""
+        relative = self._relative_path(schema_url)
+        return relative.split('/', 1)[0] if relative else 'remote'
+
+    def main_urls(self) -> List[str]:
+        """URL of the main schema of every locally available version."""
+        return [url for url in self.known_urls() if url.endswith('/main.xsd')]
+
+    def _find_path(self, schema_url: str) -> Optional[str]:
+        relative = self._relative_path(schema_url)
+        if relative is None:
+            return None
+
+        for root in self.roots:
+            candidate = os.path.join(root, *relative.split('/'))
+            if os.path.isfile(candidate):
+                return candidate
+
+        # Flat directories (e.g. a hand-made --schema-dir) are matched by name
+        filename = os.path.basename(relative)
+        for root in self.roots:
+            candidate = os.path.join(root, filename)
+            if os.path.isfile(candidate):
+                return candidate
+
+        return None
+
+    def fingerprint(self, schema_url: Optional[str]) -> str:
+        """Return a digest that changes whenever the schema at schema_url does.
+        
+        Local schemas are hashed together with every XSD beside or below them
+        (which covers their includes); remote schemas can only be identified
+        by URL.
+        """
+        if not schema_url:
+            return ''
+        if schema_url not in self._fingerprints:
+            import hashlib
+            
+            path = self.path_for(schema_url)
+            if path is None:
+                self._fingerprints[schema_url] = schema_url
+            else:
+                digest = hashlib.sha256()
+                for xsd in sorted(Path(path).parent.rglob('*.xsd')):
+                    digest.update(xsd.name.encode('utf-8'))
+                    digest.update(xsd.read_bytes())
+                self._fingerprints[schema_url] = digest.hexdigest()
+        return self._fingerprints[schema_url]
+
+    def parser(self, allow_network: bool = True) -> 'etree.XMLParser':
+        """A parser for schema documents that resolves their xs:include and
+        xs:import targets from this registry."""
+        from lxml import etree
+        
+        parser = etree.XMLParser()
+        parser.resolvers.add(_registry_resolver()(self, allow_network))
+        return parser
+        
+    def load(self, schema_url: str, allow_network: bool = True) -> 'etree.XMLSchema':
+        """Compile the schema at schema_url, resolving includes locally."""
+        from lxml import etree
+        
+        parser = self.parser(allow_network)
+
+        path = self.path_for(schema_url)
+        if path is not None:
+            schema_doc = etree.parse(path, parser, base_url=schema_url)
+        elif allow_network:
+            schema_doc = etree.fromstring(_fetch(schema_url), parser, base_url=schema_url)
+        else:
+            raise FileNotFoundError(f"No local copy of schema {schema_url}")
+
+        with _COMPILE_LOCK:
+            return etree.XMLSchema(schema_doc)
+
+
+class SchemaPool:
+    """Compiled schemas shared by every document of a run, keyed by URL.
+    
+    All locally known versions can be compiled up front, optionally on a
+    background thread, so a mixed v1/v2 library does not stall mid-scan the
+    first time it meets each version.
+    
+    A compiled schema keeps a single error log, so it is only ever used by
+    one thread at a time: validating threads acquire a copy and release it
+    when done. The first copy is the one compiled (or preloaded) for the
+    pool; a thread finding every copy in use compiles another, so there are
+    only as many copies as threads ever validated at once.
+    """
+
+    def __init__(self, registry: SchemaRegistry, allow_network: bool = True,
+                 on_compile: Optional[Callable[[str, str, float, float], None]] = None):
+        self.registry = registry
+        self.allow_network = allow_network
+        # Called as on_compile(schema_url, version, wall_seconds, cpu_seconds)
+        self.on_compile = on_compile
+        # Compiled schemas keyed by local path (or URL for remote schemas)
+        self.schemas: Dict[str, 'etree.XMLSchema'] = {}
+        self._pending: Dict[str, 'Future'] = {}
+        self._executor: Optional['ThreadPoolExecutor'] = None
+        # Held while looking up or compiling, so threads asking for the same
+        # schema compile it once
+        self._lock = threading.Lock()
+        # Keys whose first copy has been handed out
+        self._claimed = set()
+        # Copies not in use, keyed like schemas
+        self._idle: Dict[str, List['etree.XMLSchema']] = {}
+
+    def _key(self, schema_url: str) -> str:
+        # URLs that alias the same local file (e.g. legacy unversioned ones)
+        # share one compiled schema
+        return self.registry.path_for(schema_url) or schema_url
+
+    def preload(self, background: bool = False):
+        """Compile the main schema of every local version."""
+        for url in self.registry.main_urls():
+            key = self._key(url)
+            if key in self.schemas or key in self._pending:
+                continue
+            if background:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    
+                    self._executor = ThreadPoolExecutor(max_workers=1)
+                self._pending[key] = self._executor.submit(self._compile, url)
+            else:
+                self.schemas[key] = self._compile(url)
+
+    def acquire(self, schema_url: str) -> 'etree.XMLSchema':
+        """Take a compiled schema for a URL for this thread's use, compiling
+        it if needed; hand it back with release()."""
+        key = self._key(schema_url)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+            if key not in self._claimed:
+                self._claimed.add(key)
+                schema = self.schemas.get(key)
+                if schema is None:
+                    pending = self._pending.pop(key, None)
+                    schema = pending.result() if pending else self._compile(schema_url)
+                    self.schemas[key] = schema
+                return schema
+        # Every copy is in use by another thread
+        return self._compile(schema_url)
+        
+    def release(self, schema_url: str, schema: 'etree.XMLSchema'):
+        """Return a schema taken with acquire() for other threads to reuse."""
+        with self._lock:
+            self._idle.setdefault(self._key(schema_url), []).append(schema)
+
+    def _compile(self, schema_url: str) -> 'etree.XMLSchema':
+        wall, cpu = time.perf_counter(), time.thread_time()
+        schema = self.registry.load(schema_url, allow_network=self.allow_network)
+        if self.on_compile is not None:
+            self.on_compile(schema_url, self.registry.version_of(schema_url),
+                            time.perf_counter() - wall, time.thread_time() - cpu)
+        return schema
+
+
+# Defined the first time a schema is compiled (see _registry_resolver)
+_resolver_class = None
+
+
+def _registry_resolver() -> type:
+    """The RegistryResolver class. It subclasses an lxml class, so it is
+    defined on first use and importing this module does not import lxml."""
+    global _resolver_class
+    if _resolver_class is None:
+        from lxml import etree
+        
+        class RegistryResolver(etree.Resolver):
+            """lxml resolver serving xs:include/xs:import targets from a registry."""
+
+            EMPTY_SCHEMA = '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"/>'
+
+            def __init__(self, registry: SchemaRegistry, allow_network: bool = True):
+                super().__init__()
+                self.registry = registry
+                self.allow_network = allow_network
+                self._served = set()
+
+            def resolve(self, url, id, context):
+                path = self.registry.path_for(url)
+                if path is not None:
+                    # libxml2 de-duplicates includes by URL, but the legacy
+                    # unversioned URLs alias the v1 files; hand out an empty schema
+                    # for a file already included under another URL.
+                    if path in self._served:
+                        return self.resolve_string(self.EMPTY_SCHEMA, context)
+                    self._served.add(path)
+                    return self.resolve_filename(path, context)
+
+                if self.allow_network and url.startswith(('http://', 'https://')):
+                    return self.resolve_string(_fetch(url), context, base_url=url)
+
+                # Let libxml2 handle it (it will fail for remote URLs, as network
+                # access is disabled on the parser)
+                return None
+        
+        _resolver_class = RegistryResolver
+    return _resolver_class
+
+
+def main():
+    """List the bundled schema URLs and the files they map to."""
+    registry = SchemaRegistry()
+    if not registry.roots:
+        print("No schema roots found")
+        sys.exit(1)
+
+    for url in registry.known_urls():
+        print(f"{url} -> {registry.path_for(url)}")
+
+
+if __name__ == "__main__":
+    main()
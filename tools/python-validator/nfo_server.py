@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validator Daemon
+Keeps compiled schemas resident and answers validation requests over a local
+Unix socket (see nfo_client.py for the protocol and a thin client).
+"""
+
+import base64
+import errno
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers newline-delimited JSON requests until the client disconnects."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise TypeError("expected a JSON object")
+                reply = self.server.answer(request)
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {'error': f"Bad request: {e}"}
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class ValidationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server validating documents with one shared NFOValidator."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, validator):
+        self.socket_path = socket_path
+        self.validator = validator
+
+        # Replace a stale socket left behind by a daemon that did not exit
+        # cleanly, but never that of a daemon still answering on it
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            if _answers(socket_path):
+                raise OSError(errno.EADDRINUSE,
+                              "A validator daemon is already listening", socket_path)
+            os.unlink(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def preload(self):
+        """Compile every bundled main schema up front."""
+        self.validator.schema_pool.preload()
+
+    def answer(self, request: dict) -> dict:
+        strict = bool(request.get('strict', False))
+        if 'path' in request:
+            name = request['path']
+            is_valid, errors = self.validator.validate_file(name, strict=strict)
+        else:
+            name = request.get('name', '<bytes>')
+            data = base64.b64decode(request['data'])
+            is_valid, errors = self.validator.validate_bytes(data, name=name, strict=strict)
+        return {'file': name, 'valid': is_valid, 'errors': errors}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _answers(socket_path: str) -> bool:
+    """Whether a daemon accepts connections on socket_path."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(validator, socket_path: str):
+    """Run the daemon until interrupted or terminated."""
+    signal.signal(signal.SIGTERM, _stop)
+    with ValidationServer(socket_path, validator) as server:
+        server.preload()
+        print(f"Listening on {socket_path}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
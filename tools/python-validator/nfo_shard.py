@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Validation Sharding
+Splits a library between several hosts (`--shard i/N`) and merges the
+per-shard outputs (`nfo-validate merge`) back into one report.
+
+Files are assigned to shards by a stable hash of their path relative to the
+directory named on the command line, so hosts that mount the library at
+different places still agree on the partition.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import zlib
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+
+class Shard(NamedTuple):
+    """Shard index (1-based) out of count."""
+    index: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def owns(self, key: str) -> bool:
+        """Whether the file identified by key belongs to this shard."""
+        return shard_of(key, self.count) == self.index
+
+
+def parse_shard(value: str) -> Shard:
+    """argparse type for "i/N" with 1 <= i <= N."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and {count}")
+    return Shard(index, count)
+
+
+def shard_of(key: str, count: int) -> int:
+    """1-based shard a key is assigned to; the same on every host and run."""
+    key = key.replace(os.sep, '/')
+    return zlib.crc32(key.encode('utf-8', 'surrogateescape')) % count + 1
+
+
+def summary_record(shard: Shard, files: int, invalid: int) -> str:
+    """NDJSON trailer written by a shard, so merge knows its totals."""
+    return json.dumps({"shard": str(shard), "files": files, "invalid": invalid})
+
+
+class MergedReport:
+    """Results and totals combined from several shard outputs.
+
+    Totals come from each NDJSON input's shard trailer when it has one (a
+    shard run with --quiet lists only its invalid files), otherwise from
+    the results the input lists.
+    """
+
+    def __init__(self):
+        # file -> (valid, errors); a file reported twice keeps its last result
+        self.results: Dict[str, Tuple[bool, List[str]]] = {}
+        # "i/N" of every shard trailer seen
+        self.shards: List[str] = []
+        self.files = 0
+        self.invalid = 0
+        self.duplicates = 0
+
+    def _add(self, filepath: str, is_valid: bool, errors: List[str]):
+        if filepath in self.results:
+            self.duplicates += 1
+        self.results[filepath] = (is_valid, errors)
+
+    def read(self, path: str):
+        """Add an NDJSON report or a --since-manifest database."""
+        with open(path, 'rb') as f:
+            header = f.read(len(SQLITE_HEADER))
+        results = self._read_manifest(path) if header == SQLITE_HEADER else self._read_ndjson(path)
+
+        files = invalid = 0
+        trailer = None
+        for record in results:
+            if isinstance(record, dict):
+                trailer = record
+                continue
+            filepath, is_valid, errors = record
+            self._add(filepath, is_valid, errors)
+            files += 1
+            invalid += not is_valid
+        if trailer is not None:
+            self.shards.append(trailer['shard'])
+            files, invalid = trailer['files'], trailer['invalid']
+        self.files += files
+        self.invalid += invalid
+
+    def _read_ndjson(self, path: str) -> Iterator:
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    raise ValueError(f"{path}:{number}: not an NDJSON record")
+                if 'shard' in record:
+                    yield record
+                else:
+                    yield record['file'], record['valid'], record['errors']
+
+    def _read_manifest(self, path: str) -> Iterator:
+        conn = sqlite3.connect(path)
+        try:
+            for filepath, valid, errors in conn.execute(
+                    "SELECT path, valid, errors FROM results ORDER BY path"):
+                yield filepath, bool(valid), json.loads(errors)
+        finally:
+            conn.close()
+
+    def missing_shards(self) -> List[str]:
+        """Shards of the i/N split that contributed no NDJSON trailer."""
+        counts = {int(name.split('/')[1]) for name in self.shards}
+        if len(counts) != 1:
+            return []
+        count = counts.pop()
+        return [f"{index}/{count}" for index in range(1, count + 1)
+                if f"{index}/{count}" not in self.shards]
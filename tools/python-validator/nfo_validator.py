@@ -2,18 +2,29 @@
 """
 NFO Standard Validator
 A Python tool for validating NFO files against the NFO Standard XSD schemas.
+
+This module is the entry point of per-file hooks, so modules needed only by
+optional features (multiprocessing, the manifest's sqlite3, strict rules,
+JSON/XML output) are imported where they are first used. So is lxml, which
+--help and argument errors do not need.
 """
 
 import argparse
+import itertools
 import sys
 import os
-from pathlib import Path
-from typing import List, Tuple, Optional
-import xml.etree.ElementTree as ET
-from lxml import etree
-import requests
-from urllib.parse import urlparse
-import json
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Optional
+from nfo_discovery import DEFAULT_INCLUDE, FileDiscovery
+from nfo_limits import (DEFAULT_LIMITS, PARSE_CHUNK, Deadline, LimitExceeded, ParseLimits,
+                        TreeCheck, check_doctype, check_size, parse_limited)
+from nfo_schemas import (SchemaPool, SchemaRegistry, XSI_SCHEMA_LOCATION,
+                         parse_schema_location)
+
+# Environment variable naming the result cache (see nfo_cache) used by
+# default by the NFO tools, so they share results
+CACHE_ENV = 'NFO_VALIDATOR_CACHE'
 
 
 class NFOValidator:
@@ -21,76 +32,354 @@ class NFOValidator:
     
     SCHEMA_BASE_URL = "https://xsd.nfostandard.com/"
     MAIN_SCHEMA = "main.xsd"
+    # Files handed to a pool worker per round trip in parallel mode
+    POOL_CHUNKSIZE = 16
+    # Pool chunks per worker of documents read ahead by this process (see
+    # _execute_read_ahead); bounds the memory they hold
+    READ_AHEAD_CHUNKS = 4
+    # Options of the parser each thread reuses for every document: no
+    # network access, DTDs or entity expansion, and libxml2's default
+    # safety limits on text and tree size (huge_tree off)
+    PARSER_OPTIONS = {'no_network': True, 'load_dtd': False, 'resolve_entities': False,
+                      'huge_tree': False}
+    # Bumped when error messages change, so results stored by the manifest
+    # and result cache are not reported in their old wording
+    MESSAGES_VERSION = 3
     
-    def __init__(self, offline: bool = False, schema_dir: Optional[str] = None):
+    def __init__(self, offline: bool = False, schema_dir: Optional[str] = None,
+                 manifest: Optional[str] = None, rule_files: Optional[List[str]] = None,
+                 preload_schemas: bool = False, all_errors: bool = False,
+                 dedupe: bool = False, limits: Optional[ParseLimits] = None,
+                 consistency: bool = False, cache: Optional[str] = None,
+                 cache_max_bytes: Optional[int] = None, rules: Optional['RuleEngine'] = None):
         self.offline = offline
         self.schema_dir = schema_dir
-        self.schemas_cache = {}
         self.main_schema = None
+        self.preload_schemas = preload_schemas
+        # Report every schema error in a document rather than the first
+        self.all_errors = all_errors
+        # Per-document size, depth, element count and time limits
+        self.limits = limits or ParseLimits()
+        # Strict-mode rules: the built-in ones plus rule_files, compiled on
+        # first use unless passed in compiled (pool workers compile their own)
+        self.rule_files = list(rule_files or [])
+        self._rules = rules
+        self.hooks = []
+        self._local = threading.local()
+        # Which files directory scans find (include/exclude globs, skipped
+        # directories, walker threads)
+        self.discovery = FileDiscovery()
         
-    def _load_schema(self, schema_url: str) -> etree.XMLSchema:
-        """Load and cache XSD schema."""
-        if schema_url in self.schemas_cache:
-            return self.schemas_cache[schema_url]
-            
-        if self.offline and self.schema_dir:
-            # Load from local directory
-            schema_filename = os.path.basename(urlparse(schema_url).path)
-            schema_path = os.path.join(self.schema_dir, schema_filename)
-            with open(schema_path, 'rb') as f:
-                schema_doc = etree.parse(f)
-        else:
-            # Load from URL
-            response = requests.get(schema_url, timeout=10)
-            response.raise_for_status()
-            schema_doc = etree.fromstring(response.content)
+        # Known schema URLs are always served from local files; schema_dir,
+        # if given, takes precedence over the bundled schemas.
+        roots = SchemaRegistry.default_roots()
+        if schema_dir:
+            roots.insert(0, schema_dir)
+        self.registry = SchemaRegistry(roots)
+        
+        # Compiled schemas for every version seen (or preloaded), keyed by
+        # URL; unknown URLs are only fetched over the network when not offline
+        self.schema_pool = SchemaPool(self.registry, allow_network=not offline,
+                                      on_compile=self._on_compile)
+        self.schemas_cache = self.schema_pool.schemas
+        # With preload_schemas, every local version is compiled in the
+        # background once this process starts validating (see _preload)
+        self._preloading = False
+            
+        # With dedupe, byte-identical files are validated once per run and
+        # duplicate groups are collected here
+        self.dedupe_stats = None
+        if dedupe:
+            from nfo_dedupe import DuplicateStats
+            
+            self.dedupe_stats = DuplicateStats()
+            
+        # With consistency, facts for the cross-file checks are taken from
+        # every parsed document
+        self.index = None
+        if consistency:
+            from nfo_consistency import LibraryIndex
             
-        # Create XMLSchema with custom resolver for includes
-        schema = etree.XMLSchema(schema_doc)
-        self.schemas_cache[schema_url] = schema
-        return schema
+            self.index = LibraryIndex()
+            
+        # Optional store of earlier results used to skip unchanged files
+        self.manifest = None
+        # Misses handed out for validation: task tag -> (entry, strict).
+        # Tags tell apart tasks for one file (e.g. strict and not).
+        self._manifest_pending = {}
+        self._manifest_lock = threading.Lock()
+        self._task_tags = itertools.count()
+        if manifest:
+            from nfo_manifest import ValidationManifest
+            
+            self.manifest = ValidationManifest(manifest, self.registry,
+                                               strict_fingerprint=self.rules.fingerprint(),
+                                               variant=self._variant())
+            
+        # Optional result cache keyed by content, shared with other tools
+        self.cache = None
+        if cache:
+            from nfo_cache import ResultCache
+            
+            options = {} if cache_max_bytes is None else {'max_bytes': cache_max_bytes}
+            self.cache = ResultCache(cache, self.registry,
+                                     strict_fingerprint=self.rules.fingerprint(),
+                                     variant=self._variant(), **options)
+        
+    def _variant(self) -> str:
+        """Identifies the options that change results, for stored results."""
+        variant = [f'messages={self.MESSAGES_VERSION}']
+        if self.all_errors:
+            variant.append('all-errors')
+        if self.limits.fingerprint():
+            variant.append(f'limits={self.limits.fingerprint()}')
+        return '+'.join(variant)
+        
+    def close(self):
+        """Flush and close the manifest and result cache, if any."""
+        if self.manifest is not None:
+            self.manifest.close()
+            self.manifest = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        
+    def _on_compile(self, schema_url: str, version: str, wall: float, cpu: float):
+        """Report schema compilation to the hooks as a 'compile:<version>' phase."""
+        self._emit(schema_url, f'compile:{version}', wall, cpu)
         
     def validate_file(self, filepath: str, strict: bool = False) -> Tuple[bool, List[str]]:
         """Validate a single NFO file."""
-        errors = []
-        
-        try:
-            # Parse the XML file
+        def read():
             with open(filepath, 'rb') as f:
-                doc = etree.parse(f)
+                # Oversized files are rejected without reading them
+                check_size(os.fstat(f.fileno()).st_size, self.limits)
+                return f.read()
                 
-            # Get the schema location from the document
-            root = doc.getroot()
-            schema_location = root.get('{http://www.w3.org/2001/XMLSchema-instance}schemaLocation')
+        return self._validate(filepath, read, strict)
+        
+    def validate_bytes(self, data: bytes, name: str = "<bytes>",
+                       strict: bool = False) -> Tuple[bool, List[str]]:
+        """Validate a serialized NFO document held in memory.
+        
+        name identifies the document in error messages and timing hooks.
+        Safe to call from several threads at once.
+        """
+        return self._validate(name, lambda: data, strict)
+        
+    def validate_tree(self, doc, name: Optional[str] = None,
+                      strict: bool = False) -> Tuple[bool, List[str]]:
+        """Validate an already parsed document (an ElementTree or its root element).
+        
+        Skips reading and parsing entirely; name defaults to the document's
+        URL. Safe to call from several threads at once.
+        """
+        from lxml import etree
+        
+        if isinstance(doc, etree._Element):
+            doc = doc.getroottree()
+        name = name or doc.docinfo.URL or "<tree>"
+        self._preload()
+        return self._timed(name, 'total', self._check_tree, name, doc, strict,
+                           Deadline(self.limits.timeout))
+        
+    def add_hook(self, hook: Callable[[str, str, float, float], None]):
+        """Register a timing hook.
+        
+        hook(name, phase, wall_seconds, cpu_seconds) is called after each
+        phase of validating a document ('read', 'parse', 'schema_load',
+        'validate', 'strict') and once per document with phase 'total'.
+        In parallel mode the timings are measured in the workers and
+        replayed to the hooks in this process as results arrive.
+        """
+        self.hooks.append(hook)
+        
+    def _emit(self, name: str, phase: str, wall: float, cpu: float):
+        for hook in self.hooks:
+            hook(name, phase, wall, cpu)
             
-            if not schema_location:
-                errors.append("No xsi:schemaLocation attribute found")
-                return False, errors
-                
-            # Extract schema URL
-            parts = schema_location.split()
-            if len(parts) >= 2:
-                schema_url = parts[1]
-            else:
-                errors.append("Invalid xsi:schemaLocation format")
-                return False, errors
+    def _timed(self, name: str, phase, func: Callable, *args):
+        """Call func(*args), reporting its wall and CPU time to the hooks.
+        
+        phase may be a tuple to report the same timing under several names.
+        """
+        if not self.hooks:
+            return func(*args)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            return func(*args)
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            for each in (phase if isinstance(phase, tuple) else (phase,)):
+                self._emit(name, each, wall, cpu)
+            
+    def _preload(self):
+        """Start compiling every local schema version in the background, if
+        preload_schemas is set. Only called in a process that validates, so a
+        --jobs parent does not compile schemas it never uses."""
+        if self.preload_schemas and not self._preloading:
+            self._preloading = True
+            self.schema_pool.preload(background=True)
+            
+    def _validate(self, name: str, read: Callable[[], bytes],
+                  strict: bool = False) -> Tuple[bool, List[str]]:
+        """Read a document with read() and validate it."""
+        self._preload()
+        return self._timed(name, 'total', self._check, name, read, strict,
+                           Deadline(self.limits.timeout))
+        
+    def _check(self, name: str, read: Callable[[], bytes], strict: bool,
+               deadline: Deadline) -> Tuple[bool, List[str]]:
+        from lxml import etree
+        
+        key = None
+        if self.index is not None:
+            # Facts indexed under name before (watch mode) are replaced
+            self.index.add(name, None)
+        try:
+            with deadline:
+                # Read and parse the XML document
+                data = self._timed(name, 'read', read)
+                check_size(len(data), self.limits)
+                if self.cache is not None:
+                    key = self.cache.key(data, strict)
+                    cached = self.cache.get(key, name)
+                    if cached is not None:
+                        if self.index is not None:
+                            text = self._cache_hit_facts(key, data, name)
+                            self.index.add(name, self._stored_facts(text, data, name))
+                        return cached
+                deadline.check()
+                doc = self._timed(name, 'parse', self._parse, data, name, deadline)
+                result = self._check_tree(name, doc, strict, deadline, limits_checked=True)
+        except etree.XMLSyntaxError as e:
+            result = False, [f"XML syntax error: {str(e)}"]
+        except LimitExceeded as e:
+            result = False, [str(e)]
+        except Exception as e:
+            result = False, [f"Unexpected error: {str(e)}"]
+            
+        if key is not None:
+            self.cache.put(key, name, *result, facts=self._facts_text(name))
+        return result
+        
+    def _facts_text(self, name: str) -> Optional[str]:
+        """The consistency facts indexed for name, in the form stored with
+        its result; None when there is no index (so none are known)."""
+        if self.index is None:
+            return None
+        from nfo_consistency import encode_facts
+        
+        return encode_facts(self.index.facts.get(name))
+        
+    def _cache_hit_facts(self, key: str, data: bytes, name: str) -> str:
+        """Consistency facts of a result cache hit, as stored (see
+        _facts_text); those of a result stored without any are taken now and
+        stored with it."""
+        text = self.cache.facts(key)
+        if text is None:
+            from nfo_consistency import encode_facts
+            
+            text = encode_facts(self._stored_facts(None, data, name))
+            self.cache.set_facts(key, text)
+        return text
+        
+    def _stored_facts(self, text: Optional[str], data: Optional[bytes],
+                      name: str) -> Optional['DocumentFacts']:
+        """Consistency facts of a document answered from a stored result.
+        
+        They are those stored with the result, if any were; otherwise the
+        document (data, or the file name if data is None) is parsed within
+        self.limits to take them.
+        """
+        from lxml import etree
+        from nfo_consistency import decode_facts, extract_facts
+        
+        if text is not None:
+            return decode_facts(text)
+        try:
+            if data is None:
+                data = self._read_file(name)
+            if data is None:
+                return None
+            return extract_facts(self._parse(data, name, Deadline(self.limits.timeout)))
+        except (etree.XMLSyntaxError, LimitExceeded):
+            # Results stored for such documents carry their errors
+            return None
+        
+    def _read_file(self, filepath: str) -> Optional[bytes]:
+        """A file's content for validation elsewhere, or None if it cannot be
+        read or is over the size limit (validate_file reports why)."""
+        try:
+            with open(filepath, 'rb') as f:
+                if self.limits.max_bytes and os.fstat(f.fileno()).st_size > self.limits.max_bytes:
+                    return None
+                return f.read()
+        except OSError:
+            return None
+        
+    def _check_tree(self, name: str, doc: 'etree._ElementTree', strict: bool,
+                    deadline: Deadline, limits_checked: bool = False) -> Tuple[bool, List[str]]:
+        from lxml import etree
+        
+        errors = []
+        
+        try:
+            with deadline:
+                if not limits_checked:
+                    self._tree_check()(doc.getroot())
+                deadline.check()
+                if self.index is not None:
+                    self.index.add_tree(name, doc)
                 
-            # Load and validate against schema
-            try:
-                schema = self._load_schema(schema_url)
-                schema.assertValid(doc)
+                # Get the schema location from the document
+                root = doc.getroot()
+                schema_location = root.get(XSI_SCHEMA_LOCATION)
                 
-                # Additional strict validation
-                if strict:
-                    strict_errors = self._strict_validation(doc)
-                    errors.extend(strict_errors)
+                if not schema_location:
+                    errors.append("No xsi:schemaLocation attribute found")
+                    return False, errors
                     
-            except etree.XMLSchemaError as e:
-                errors.append(f"Schema validation error: {str(e)}")
-                return False, errors
-                
-        except etree.XMLSyntaxError as e:
-            errors.append(f"XML syntax error: {str(e)}")
+                # Extract the schema URL for the document's namespace
+                schema_url = parse_schema_location(schema_location, etree.QName(root).namespace)
+                if schema_url is None:
+                    errors.append("Invalid xsi:schemaLocation format")
+                    return False, errors
+                    
+                # Load and validate against schema; validation time is also
+                # reported per schema version
+                try:
+                    # A compiled schema is used by one thread at a time
+                    schema = self._timed(name, 'schema_load', self.schema_pool.acquire,
+                                         schema_url)
+                    try:
+                        version = self.registry.version_of(schema_url)
+                        phase = ('validate', f'validate:{version}')
+                        deadline.check()
+                        if self.all_errors:
+                            # One pass collects every violation in the error log
+                            if not self._timed(name, phase, schema.validate, doc):
+                                errors.extend(
+                                    f"Schema validation error: {entry.message}, "
+                                    f"line {entry.line}" for entry in schema.error_log)
+                        else:
+                            self._timed(name, phase, schema.assertValid, doc)
+                    finally:
+                        self.schema_pool.release(schema_url, schema)
+                    
+                    # Additional strict validation
+                    if strict:
+                        deadline.check()
+                        strict_errors = self._timed(name, 'strict', self._strict_validation, doc)
+                        errors.extend(strict_errors)
+                        
+                # assertValid raises DocumentInvalid for the first violation
+                except (etree.XMLSchemaError, etree.DocumentInvalid) as e:
+                    errors.append(f"Schema validation error: {str(e)}")
+                    return False, errors
+                    
+        except LimitExceeded as e:
+            errors.append(str(e))
             return False, errors
         except Exception as e:
             errors.append(f"Unexpected error: {str(e)}")
@@ -98,69 +387,379 @@ class NFOValidator:
             
         return len(errors) == 0, errors
         
-    def _strict_validation(self, doc: etree.ElementTree) -> List[str]:
+    def _parser(self) -> 'etree.XMLParser':
+        """This thread's parser; lxml parsers must not be shared between threads."""
+        parser = getattr(self._local, 'parser', None)
+        if parser is None:
+            from lxml import etree
+            
+            parser = self._local.parser = etree.XMLParser(**self.PARSER_OPTIONS)
+        return parser
+        
+    def _tree_check(self) -> TreeCheck:
+        """This thread's depth and element count check for self.limits."""
+        check = getattr(self._local, 'tree_check', None)
+        if check is None or check.limits != self.limits:
+            check = self._local.tree_check = TreeCheck(self.limits)
+        return check
+        
+    def _parse(self, data: bytes, name: str,
+               deadline: Optional[Deadline] = None) -> 'etree._ElementTree':
+        """Parse a document within self.limits; name is used as its URL in
+        error messages.
+        
+        Documents over PARSE_CHUNK bytes are parsed incrementally, so one
+        that is too deep, has too many elements or runs out of time is
+        abandoned part way (see parse_limited). Documents with a DOCTYPE
+        are rejected (see check_doctype).
+        """
+        if len(data) > PARSE_CHUNK:
+            return parse_limited(data, name, self.PARSER_OPTIONS, self.limits,
+                                 deadline or Deadline(0)).getroottree()
+        from lxml import etree
+        
+        check_doctype(data)
+        root = etree.fromstring(data, self._parser(), base_url=name)
+        self._tree_check()(root)
+        return root.getroottree()
+        
+    def _strict_validation(self, doc: 'etree._ElementTree') -> List[str]:
         """Perform additional strict validation checks."""
-        errors = []
-        root = doc.getroot()
-        
-        # Check for best practices
-        media = root.find('.//{NFOStandard}media')
-        if media is not None:
-            # Check for recommended fields based on media type
-            for media_type in ['movie', 'tvshow', 'music', 'audiobook', 'podcast']:
-                element = media.find(f'.//{{{root.nsmap[None]}}}{media_type}')
-                if element is not None:
-                    errors.extend(self._check_recommended_fields(element, media_type))
-                    
-        return errors
-        
-    def _check_recommended_fields(self, element: etree.Element, media_type: str) -> List[str]:
-        """Check for recommended fields based on media type."""
-        warnings = []
-        
-        recommended_fields = {
-            'movie': ['year', 'runtime', 'genre', 'director', 'actor', 'plot'],
-            'tvshow': ['year', 'genre', 'actor', 'plot', 'season', 'episode'],
-            'music': ['artist', 'album', 'year', 'genre'],
-            'audiobook': ['author', 'narrator', 'publisher', 'year'],
-            'podcast': ['author', 'category', 'pubDate', 'duration']
-        }
-        
-        if media_type in recommended_fields:
-            for field in recommended_fields[media_type]:
-                if element.find(f'.//{{{element.nsmap[None]}}}{field}') is None:
-                    warnings.append(f"Warning: Recommended field '{field}' is missing for {media_type}")
-                    
-        return warnings
+        return self.rules.check(doc)
+        
+    @property
+    def rules(self) -> 'RuleEngine':
+        """Strict-mode rules, compiled on first use."""
+        if self._rules is None:
+            from nfo_rules import RuleEngine
+            
+            self._rules = RuleEngine.from_files(self.rule_files)
+        return self._rules
         
     def validate_directory(self, directory: str, recursive: bool = False, 
-                         pattern: str = "*.nfo") -> List[Tuple[str, bool, List[str]]]:
+                         pattern: Optional[str] = None, jobs: int = 1) -> List[Tuple[str, bool, List[str]]]:
         """Validate all NFO files in a directory."""
-        results = []
-        path = Path(directory)
+        return list(self.iter_validate(directory, recursive, pattern, jobs=jobs))
+        
+    def iter_validate(self, directory: str, recursive: bool = False,
+                      pattern: Optional[str] = None, strict: bool = False,
+                      jobs: int = 1) -> Iterator[Tuple[str, bool, List[str]]]:
+        """Validate the NFO files in a directory, yielding each result as it finishes.
+        
+        Files are discovered lazily and nothing is accumulated, so memory use
+        does not grow with the size of the library.
+        """
+        files = self._find_files(directory, recursive, pattern)
+        return self.validate_files(files, strict=strict, jobs=jobs)
+        
+    def validate_files(self, filepaths: Iterable[str], strict: bool = False,
+                       jobs: int = 1) -> Iterator[Tuple[str, bool, List[str]]]:
+        """Validate many files, yielding results as they complete.
+        
+        With jobs > 1 (or 0 for one per CPU) files are fanned out to a
+        process pool; results then arrive in completion order, not input order.
+        """
+        tasks = ((str(filepath), strict) for filepath in filepaths)
+        return self._run_tasks(tasks, jobs)
+        
+    def validate_archive(self, archive: str, strict: bool = False, jobs: int = 1,
+                         pattern: Optional[str] = None) -> Iterator[Tuple[str, bool, List[str]]]:
+        """Validate the NFO files in a zip or tar archive without extracting it.
+        
+        Members are read into memory and results are reported as
+        "archive!member". Without a pattern (a glob matched against member
+        base names), members are selected like files by self.discovery. An
+        archive that cannot be read gives one invalid result named after it.
+        """
+        from nfo_archive import validate_archive
+        
+        return validate_archive(self, archive, strict=strict, jobs=jobs, pattern=pattern)
+        
+    def _find_files(self, directory: str, recursive: bool = False,
+                    pattern: Optional[str] = None) -> Iterator[str]:
+        """Yield the paths in a directory matching pattern.
+        
+        Without a pattern, self.discovery's include globs are used.
+        """
+        discovery = self.discovery
+        if pattern is not None:
+            discovery = FileDiscovery([pattern], discovery.exclude, discovery.skip_dirs,
+                                      discovery.threads)
+        return discovery.iter_files(directory, recursive)
+        
+    def _run_tasks(self, tasks: Iterable[Tuple[str, bool]],
+                   jobs: int = 1) -> Iterator[Tuple[str, bool, List[str]]]:
+        """Validate (filepath, strict) tasks, answering from the manifest where possible.
+        
+        The manifest is consulted as each task is handed out (see
+        _read_task), so hits stream out with the other results; misses are
+        recorded as their results arrive.
+        """
+        if self.manifest is None:
+            for _, filepath, is_valid, errors in self._validate_tasks(tasks, jobs):
+                yield filepath, is_valid, errors
+            return
+            
+        for tag, filepath, is_valid, errors in self._validate_tasks(tasks, jobs):
+            with self._manifest_lock:
+                pending = self._manifest_pending.pop(tag, None)
+            if pending is not None:
+                entry, strict = pending
+                self.manifest.record(filepath, entry, strict, is_valid, errors,
+                                     facts=self._facts_text(filepath))
+            yield filepath, is_valid, errors
+            
+    def _read_task(self, filepath: str, strict: bool, tag: int
+                   ) -> Tuple[Optional[Tuple[bool, List[str], Optional[str]]], Optional[bytes]]:
+        """(manifest result, None) for a manifest hit, else (None, the file's
+        content) for validation elsewhere; the content is None if the file
+        cannot be read or is over the size limit (validate_file reports why).
+        A manifest result is (is_valid, errors, stored facts) and is
+        reported with a _known_result call.
+        
+        Misses are noted under the task's tag (see _read_calls) for
+        _run_tasks to record. Runs on whichever thread hands out work.
+        """
+        if self.manifest is None:
+            return None, self._read_file(filepath)
+        cached, entry, data = self.manifest.lookup(filepath, strict, self.limits.max_bytes)
+        if cached is not None and cached[2] is None and self.index is not None:
+            from nfo_consistency import encode_facts
+            
+            # Recorded without consistency facts: they are taken (and
+            # recorded) once
+            facts = encode_facts(self._stored_facts(None, None, filepath))
+            self.manifest.set_facts(filepath, facts)
+            cached = cached[:2] + (facts,)
+        if entry is not None:
+            with self._manifest_lock:
+                self._manifest_pending[tag] = (entry, strict)
+        return cached, data
         
-        if recursive:
-            files = path.rglob(pattern)
+    def _read_calls(self, tasks: Iterable[Tuple[str, bool]],
+                    lookup: Optional[Callable[[int, str, bytes, bool], Optional[tuple]]] = None
+                    ) -> Iterator[Tuple[int, Callable, tuple]]:
+        """Tagged calls (see _execute) validating (filepath, strict) tasks
+        from content read here, each tagged with a number of its own.
+        
+        Manifest hits are answered with _known_result calls, and files that
+        cannot be read are validated by path so the error is reported as
+        usual. The rest are validated from their content, unless
+        lookup(tag, filepath, data, strict) is given: it returns the
+        (function, args) call to make instead, or None to hold the task
+        back (the caller then yields its result). With a pool this runs on
+        the pool's feeder thread.
+        """
+        for filepath, strict in tasks:
+            tag = next(self._task_tags)
+            cached, data = self._read_task(filepath, strict, tag)
+            if cached is not None:
+                call = _known_result, (filepath,) + cached
+            elif data is None:
+                call = _validate_path, (filepath, strict)
+            elif lookup is not None:
+                call = lookup(tag, filepath, data, strict)
+                if call is None:
+                    continue
+            else:
+                call = _validate_data, (filepath, data, strict)
+            yield (tag,) + call
+            
+    def _validate_tasks(self, tasks: Iterable[Tuple[str, bool]],
+                        jobs: int = 1) -> Iterator[Tuple[Any, str, bool, List[str]]]:
+        """Validate (filepath, strict) tasks serially or on a process pool,
+        yielding (tag, filepath, is_valid, errors) (see _read_calls)."""
+        if self.dedupe_stats is not None:
+            from nfo_dedupe import validate_unique
+            
+            return validate_unique(self, tasks, jobs, self.dedupe_stats)
+        if self.cache is not None and jobs != 1:
+            from nfo_cache import validate_cached
+            
+            # Workers have no cache; it is consulted here instead
+            return validate_cached(self, tasks, jobs)
+        if self.manifest is not None:
+            # Files were read for the manifest lookup anyway
+            return self._execute_read_ahead(self._read_calls(tasks), jobs, tagged=True)
+        return self._execute(((None, _validate_path, task) for task in tasks), jobs,
+                             tagged=True)
+        
+    def _execute(self, calls: Iterable[tuple], jobs: int = 1,
+                 tagged: bool = False) -> Iterator[tuple]:
+        """Run (function, args) calls serially or on a process pool.
+        
+        Each call runs as function(validator, *args) and returns
+        (name, is_valid, errors), where name is args[0]; function must be
+        defined at module level so it can be sent to pool workers. With a
+        timeout, workers are supervised (see nfo_pool).
+        
+        With tagged, calls are (tag, function, args) and results
+        (tag, name, is_valid, errors), so calls with the same name can be
+        told apart.
+        """
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
+        if not tagged:
+            calls = ((None, function, args) for function, args in calls)
+            
+        if jobs <= 1:
+            # Compiles while the first files are found and read
+            self._preload()
+            for tag, function, args in calls:
+                result = function(self, *args)
+                yield (tag,) + result if tagged else result
+            return
+            
+        # Each worker builds its own validator once, so schemas are compiled
+        # once per process rather than once per file. Leaving the loop early
+        # (e.g. the consumer stops iterating) terminates the workers.
+        if self.limits.timeout:
+            from nfo_pool import imap_supervised
+            
+            # A worker stalled inside libxml2 is killed and replaced
+            results = imap_supervised(_run_in_worker, calls, jobs, _init_worker,
+                                      (self._worker_config(),), self.limits.timeout,
+                                      _lost_in_worker, chunksize=self.POOL_CHUNKSIZE)
         else:
-            files = path.glob(pattern)
+            import multiprocessing
             
-        for filepath in files:
-            is_valid, errors = self.validate_file(str(filepath))
-            results.append((str(filepath), is_valid, errors))
+            pool = multiprocessing.Pool(jobs, initializer=_init_worker,
+                                        initargs=(self._worker_config(),))
+            results = pool.imap_unordered(_run_in_worker, calls,
+                                          chunksize=self.POOL_CHUNKSIZE)
+        try:
+            for tag, name, is_valid, errors, timings, facts in results:
+                for phase, wall, cpu in timings:
+                    self._emit(name, phase, wall, cpu)
+                if self.index is not None:
+                    self.index.add(name, facts)
+                yield (tag, name, is_valid, errors) if tagged else (name, is_valid, errors)
+        finally:
+            if self.limits.timeout:
+                results.close()
+            else:
+                pool.terminate()
+                
+    def _execute_read_ahead(self, calls: Iterable[tuple], jobs: int = 1,
+                            tagged: bool = False) -> Iterator[tuple]:
+        """_execute for calls carrying document bytes read by this process.
+        
+        Pool task iterables are drained by a feeder thread as fast as it can,
+        so reading is paused while READ_AHEAD_CHUNKS pool chunks per worker
+        are waiting for a result. Every call must produce one result.
+        """
+        workers = (jobs or os.cpu_count() or 1) if jobs != 1 else 1
+        # The limit must be at least one pool chunk, or the pool would wait
+        # for a chunk the reader can never finish.
+        slots = threading.Semaphore(workers * self.POOL_CHUNKSIZE * self.READ_AHEAD_CHUNKS)
+        stopped = threading.Event()
+        
+        def gated():
+            for call in calls:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                yield call
+                
+        results = self._execute(gated(), jobs, tagged)
+        try:
+            for result in results:
+                slots.release()
+                yield result
+        finally:
+            # If the consumer stops early, wake a blocked reader so the pool
+            # can shut down, then close it.
+            stopped.set()
+            slots.release()
+            results.close()
             
-        return results
+    def _worker_config(self) -> dict:
+        """Keyword arguments used to rebuild this validator in pool workers."""
+        return {'offline': self.offline, 'schema_dir': self.schema_dir,
+                'rule_files': self.rule_files, 'preload_schemas': self.preload_schemas,
+                'all_errors': self.all_errors, 'limits': self.limits,
+                'consistency': self.index is not None, 'profile': bool(self.hooks)}
+
+
+# Validator owned by the current pool worker process (see _init_worker).
+_worker_validator = None
+# Phase timings collected in the worker for the file being validated
+_worker_timings = []
+
+
+def _init_worker(config: dict):
+    """Pool initializer: build the per-process validator."""
+    global _worker_validator
+    profile = config.pop('profile', False)
+    _worker_validator = NFOValidator(**config)
+    _worker_validator._preload()
+    if profile:
+        _worker_validator.add_hook(
+            lambda name, phase, wall, cpu: _worker_timings.append((phase, wall, cpu)))
+    
+    
+def _run_in_worker(call: Tuple[Any, Callable, tuple]
+                   ) -> Tuple[Any, str, bool, List[str], list, Any]:
+    """Pool task: run one tagged call with the worker's validator (see
+    NFOValidator._execute).
+    
+    Phase timings and consistency facts gathered in the worker travel back
+    with the result.
+    """
+    tag, function, args = call
+    name, is_valid, errors = function(_worker_validator, *args)
+    timings = list(_worker_timings)
+    _worker_timings.clear()
+    index = _worker_validator.index
+    facts = index.facts.pop(name, None) if index is not None else None
+    return tag, name, is_valid, errors, timings, facts
+    
+    
+def _lost_in_worker(call: Tuple[Any, Callable, tuple],
+                    error: Exception) -> Tuple[Any, str, bool, List[str], list, Any]:
+    """Result for a call whose worker was killed or died (see nfo_pool)."""
+    message = str(error) if isinstance(error, LimitExceeded) else f"Unexpected error: {error}"
+    tag, function, args = call
+    return tag, args[0], False, [message], [], None
+    
+    
+def _known_result(validator: NFOValidator, name: str, is_valid: bool, errors: List[str],
+                  facts: Optional[str]) -> Tuple[str, bool, List[str]]:
+    """A result known without validating (a manifest or result cache hit,
+    or a duplicate), passed through with the other results so it is
+    reported in turn."""
+    if validator.index is not None:
+        validator.index.add(name, validator._stored_facts(facts, None, name))
+    return name, is_valid, errors
+    
+    
+def _validate_path(validator: NFOValidator, filepath: str,
+                   strict: bool) -> Tuple[str, bool, List[str]]:
+    is_valid, errors = validator.validate_file(filepath, strict=strict)
+    return filepath, is_valid, errors
+    
+    
+def _validate_data(validator: NFOValidator, name: str, data: bytes,
+                   strict: bool) -> Tuple[str, bool, List[str]]:
+    is_valid, errors = validator.validate_bytes(data, name, strict=strict)
+    return name, is_valid, errors
 
 
 def format_validation_result(filepath: str, is_valid: bool, errors: List[str], 
                            format_type: str = "text") -> str:
     """Format validation results for output."""
-    if format_type == "json":
+    if format_type in ("json", "ndjson"):
+        import json
+        
+        # ndjson puts each result on a single line so output can be streamed
         return json.dumps({
             "file": filepath,
             "valid": is_valid,
             "errors": errors
-        }, indent=2)
+        }, indent=2 if format_type == "json" else None)
     elif format_type == "xml":
+        import xml.etree.ElementTree as ET
+        
         root = ET.Element("validation")
         ET.SubElement(root, "file").text = filepath
         ET.SubElement(root, "valid").text = str(is_valid).lower()
@@ -180,7 +779,125 @@ def format_validation_result(filepath: str, is_valid: bool, errors: List[str],
         return result
 
 
+def _expand_tasks(validator: NFOValidator, paths: List[str], recursive: bool,
+                  strict: bool, shard: Optional['Shard'] = None) -> Iterator[Tuple[str, bool]]:
+    """Turn command line paths into (filepath, strict) validation tasks.
+    
+    Files found by scanning a directory are checked without strict mode;
+    only files named explicitly honour --strict. With a shard, only the
+    files it owns are kept: files found in a directory are keyed by their
+    path relative to it, files named explicitly by the path as given.
+    """
+    for file_path in paths:
+        if os.path.isdir(file_path):
+            for filepath in validator._find_files(file_path, recursive=recursive):
+                if shard is None or shard.owns(os.path.relpath(filepath, file_path)):
+                    yield filepath, False
+        elif shard is None or shard.owns(file_path):
+            yield file_path, strict
+
+
+def _iter_results(validator: NFOValidator, paths: List[str], recursive: bool,
+                  strict: bool, jobs: int, shard: Optional['Shard'] = None
+                  ) -> Iterator[Tuple[str, bool, List[str]]]:
+    """Validate command line paths; archives are validated after everything else."""
+    from nfo_archive import is_archive
+    
+    archives = [path for path in paths if os.path.isfile(path) and is_archive(path)]
+    tasks = _expand_tasks(validator, [path for path in paths if path not in archives],
+                          recursive, strict, shard)
+    # An archive is sharded as a whole
+    archives = [path for path in archives if shard is None or shard.owns(path)]
+    yield from validator._run_tasks(tasks, jobs=jobs)
+    for archive in archives:
+        yield from validator.validate_archive(archive, strict=strict, jobs=jobs)
+        
+        
+def _iter_git_results(validator: NFOValidator, tasks: List[Tuple[str, bool]],
+                      jobs: int) -> Iterator[Tuple[str, bool, List[str]]]:
+    """Validate --git-diff tasks; changed archives are validated after everything else."""
+    from nfo_archive import is_archive
+    
+    archives = [(path, strict) for path, strict in tasks if is_archive(path)]
+    yield from validator._run_tasks([task for task in tasks if task not in archives],
+                                    jobs=jobs)
+    for archive, strict in archives:
+        yield from validator.validate_archive(archive, strict=strict, jobs=jobs)
+        
+        
+def serve_main(argv: List[str]):
+    """Entry point for `nfo-validate serve`."""
+    from nfo_client import default_socket_path
+    from nfo_server import serve
+    
+    parser = argparse.ArgumentParser(
+        prog="nfo-validate serve",
+        description="Run a validation daemon that keeps compiled schemas in memory"
+    )
+    parser.add_argument('--socket', default=default_socket_path(),
+                       help='Unix socket to listen on (default: %(default)s)')
+    parser.add_argument('--offline', action='store_true',
+                       help='Use offline validation with local schemas')
+    parser.add_argument('--schema-dir', help='Directory containing local schema files')
+    
+    args = parser.parse_args(argv)
+    
+    validator = NFOValidator(offline=args.offline, schema_dir=args.schema_dir)
+    try:
+        serve(validator, args.socket)
+    except OSError as e:
+        parser.error(f"cannot listen on {args.socket}: {e}")
+
+
+def merge_main(argv: List[str]):
+    """Entry point for `nfo-validate merge`."""
+    from nfo_shard import MergedReport
+    
+    parser = argparse.ArgumentParser(
+        prog="nfo-validate merge",
+        description="Combine the NDJSON reports or manifests of --shard runs into one report"
+    )
+    parser.add_argument('reports', nargs='+',
+                       help='NDJSON outputs (--format ndjson) or --since-manifest databases')
+    parser.add_argument('--format', '-f', choices=['text', 'json', 'ndjson', 'xml'],
+                       default='text', help='Output format')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Only show files with errors')
+    
+    args = parser.parse_args(argv)
+    
+    report = MergedReport()
+    for path in args.reports:
+        try:
+            report.read(path)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"cannot read {path}: {e}")
+            
+    for filepath in sorted(report.results):
+        is_valid, errors = report.results[filepath]
+        if not args.quiet or not is_valid:
+            print(format_validation_result(filepath, is_valid, errors, args.format))
+            
+    print(f"Merged {len(args.reports)} reports: {report.files} files, "
+          f"{report.invalid} invalid", file=sys.stderr)
+    if report.duplicates:
+        print(f"{report.duplicates} files were reported more than once; "
+              f"the last result was kept", file=sys.stderr)
+    missing = report.missing_shards()
+    if missing:
+        print(f"Missing shards: {', '.join(missing)}", file=sys.stderr)
+        
+    sys.exit(0 if report.invalid == 0 and not missing else 1)
+
+
 def main():
+    if sys.argv[1:2] == ['serve']:
+        serve_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['merge']:
+        merge_main(sys.argv[2:])
+        return
+        
     parser = argparse.ArgumentParser(
         description="Validate NFO files against the NFO Standard",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -189,49 +906,255 @@ Examples:
   %(prog)s movie.nfo
   %(prog)s --strict tvshow.nfo
   %(prog)s --recursive /media/library/
+  %(prog)s --recursive --jobs 0 /media/library/
+  %(prog)s --recursive --since-manifest library.db /media/library/
+  %(prog)s --watch --recursive /media/library/
+  %(prog)s --recursive --profile /media/library/
+  %(prog)s --jobs 0 library-export.zip metadata.tar.gz
+  %(prog)s --recursive --jobs 0 --fail-fast /media/library/
+  %(prog)s --all-errors --max-errors 20 /media/library/
+  %(prog)s --recursive --include '*.nfo' --include '*.xml' --exclude 'Specials/*' /media/library/
+  %(prog)s --recursive --walk-threads 16 /mnt/nas/library/
+  %(prog)s --recursive --dedupe --dedupe-report duplicates.json /media/library/
+  %(prog)s --recursive --git-diff origin/main metadata/
+  %(prog)s --recursive --consistency /media/library/
+  %(prog)s --recursive --jobs 0 --cache ~/.cache/nfo-results.db /media/library/
+  %(prog)s --recursive --jobs 0 --max-size 1048576 --timeout 5 /media/library/
+  %(prog)s --recursive --shard 2/4 --format ndjson /media/library/ > shard2.ndjson
+  %(prog)s merge shard1.ndjson shard2.ndjson shard3.ndjson shard4.ndjson
   %(prog)s --format json *.nfo
+  %(prog)s --recursive --format ndjson /media/library/ | jq .
+  %(prog)s --recursive --quiet --junit report.xml --sarif report.sarif /media/library/
+  %(prog)s serve --socket /run/nfo-validator.sock
         """
     )
     
-    parser.add_argument('files', nargs='+', help='NFO files or directories to validate')
+    parser.add_argument('files', nargs='+', help='NFO files, directories or zip/tar archives to validate')
     parser.add_argument('--strict', action='store_true', 
                        help='Enable strict validation (check recommended fields)')
+    parser.add_argument('--rules', action='append', default=[], metavar='FILE',
+                       help='Additional strict-mode rules (JSON); may be repeated')
     parser.add_argument('--recursive', '-r', action='store_true',
                        help='Recursively validate directories')
-    parser.add_argument('--format', '-f', choices=['text', 'json', 'xml'],
+    parser.add_argument('--format', '-f', choices=['text', 'json', 'ndjson', 'xml'],
                        default='text', help='Output format')
     parser.add_argument('--offline', action='store_true',
                        help='Use offline validation with local schemas')
     parser.add_argument('--schema-dir', help='Directory containing local schema files')
     parser.add_argument('--quiet', '-q', action='store_true',
                        help='Only show files with errors')
+    parser.add_argument('--preload-schemas', action='store_true',
+                       help='Compile every bundled schema version in the background '
+                            'at startup instead of on first use')
+    parser.add_argument('--since-manifest', metavar='PATH',
+                       help='Reuse and update results stored in this manifest '
+                            'file, re-validating only changed files')
+    parser.add_argument('--watch', action='store_true',
+                       help='Watch the given directories and validate NFO files '
+                            'as they are written, printing NDJSON results')
+    parser.add_argument('--debounce', type=float, default=1.0, metavar='SECONDS',
+                       help='In watch mode, wait this long after the last write '
+                            'to a file before validating it (default: %(default)s)')
+    parser.add_argument('--junit', metavar='PATH',
+                       help='Also write a JUnit XML report (one test case per file)')
+    parser.add_argument('--sarif', metavar='PATH',
+                       help='Also write a SARIF 2.1.0 report')
+    parser.add_argument('--profile', action='store_true',
+                       help='Print per-phase timings and the slowest files to stderr')
+    parser.add_argument('--profile-output', metavar='PATH',
+                       help='Write the timing profile as JSON (implies --profile)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                       help='Validate with N worker processes (0 = one per CPU)')
+    parser.add_argument('--dedupe', action='store_true',
+                       help='Validate byte-identical files once and report duplicate groups')
+    parser.add_argument('--dedupe-report', metavar='PATH',
+                       help='Write duplicate groups and time saved as JSON (implies --dedupe)')
+    parser.add_argument('--git-diff', metavar='REV',
+                       help='Only validate NFO files added or changed since git revision '
+                            'REV, plus files below a changed tvshow.nfo or season.nfo')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                       help='Find files matching GLOB when scanning directories '
+                            '(default: *.nfo); may be repeated')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                       help='Skip files whose name (or, if GLOB contains a slash, path '
+                            'relative to the directory) matches GLOB; may be repeated')
+    parser.add_argument('--walk-threads', type=int, default=1, metavar='N',
+                       help='List directories on N threads (helps on network filesystems)')
+    parser.add_argument('--max-size', type=int, default=DEFAULT_LIMITS.max_bytes, metavar='BYTES',
+                       help='Reject documents larger than BYTES (default: %(default)s; 0 = no limit)')
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_LIMITS.max_depth, metavar='N',
+                       help='Reject elements nested deeper than N (default: %(default)s; 0 = no limit)')
+    parser.add_argument('--max-elements', type=int, default=DEFAULT_LIMITS.max_elements, metavar='N',
+                       help='Reject documents with more than N elements '
+                            '(default: %(default)s; 0 = no limit)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_LIMITS.timeout, metavar='SECONDS',
+                       help='Give up on a document after SECONDS; with --jobs, a worker stuck '
+                            'in libxml2 is killed (default: no limit)')
+    parser.add_argument('--all-errors', action='store_true',
+                       help='Report every schema error in each file, not just the first')
+    parser.add_argument('--fail-fast', action='store_true',
+                       help='Stop at the first invalid file')
+    parser.add_argument('--max-errors', type=int, default=0, metavar='N',
+                       help='Stop after N invalid files (0 = no limit)')
+    parser.add_argument('--cache', metavar='PATH', default=os.environ.get(CACHE_ENV) or None,
+                       help='Reuse results for identical content from (and store new ones '
+                            f'in) a result cache shared with the other NFO tools '
+                            f'(default: ${CACHE_ENV}, if set)')
+    parser.add_argument('--cache-max-size', type=int, metavar='BYTES',
+                       help='Evict least recently used results beyond BYTES of stored results '
+                            '(default: 64 MiB; 0 = no limit)')
+    parser.add_argument('--consistency', action='store_true',
+                       help='Also check relations between files: shared uniqueids, episodes '
+                            'disagreeing with their tvshow.nfo or season.nfo, missing episodes')
+    parser.add_argument('--shard', metavar='I/N',
+                       help='Validate only the I-th of N disjoint slices of the files '
+                            '(combine the outputs with `%(prog)s merge`)')
     
     args = parser.parse_args()
     
+    shard = None
+    if args.shard:
+        from nfo_shard import parse_shard
+        
+        try:
+            shard = parse_shard(args.shard)
+        except argparse.ArgumentTypeError as e:
+            parser.error(f"--shard: {e}")
+        if args.watch:
+            parser.error("--shard cannot be combined with --watch")
+        if args.git_diff:
+            parser.error("--shard cannot be combined with --git-diff")
+    if args.consistency:
+        # The checks need every file of the library
+        for option in ('watch', 'git_diff', 'shard'):
+            if getattr(args, option):
+                parser.error(f"--consistency cannot be combined with "
+                             f"--{option.replace('_', '-')}")
+            
+    # A bad rule file is a usage error, not a failure of every document
+    rules = None
+    if args.rules:
+        from nfo_rules import RuleEngine, RuleError
+        
+        try:
+            rules = RuleEngine.from_files(args.rules)
+        except RuleError as e:
+            parser.error(f"--rules: {e}")
+            
     # Initialize validator
-    validator = NFOValidator(offline=args.offline, schema_dir=args.schema_dir)
+    validator = NFOValidator(offline=args.offline, schema_dir=args.schema_dir,
+                             manifest=args.since_manifest, rule_files=args.rules, rules=rules,
+                             preload_schemas=args.preload_schemas,
+                             all_errors=args.all_errors,
+                             dedupe=args.dedupe or bool(args.dedupe_report),
+                             limits=ParseLimits(args.max_size, args.max_depth,
+                                                args.max_elements, args.timeout),
+                             consistency=args.consistency, cache=args.cache,
+                             cache_max_bytes=args.cache_max_size)
+    validator.discovery = FileDiscovery(args.include or DEFAULT_INCLUDE, args.exclude,
+                                        threads=args.walk_threads)
+    profiler = None
+    if args.profile or args.profile_output:
+        from nfo_profile import PhaseProfiler
+        
+        profiler = PhaseProfiler()
+        validator.add_hook(profiler)
     
+    if args.watch:
+        from nfo_watch import watch
+        
+        if not all(os.path.isdir(path) for path in args.files):
+            parser.error("--watch expects directories")
+        watch(validator, args.files, recursive=args.recursive, strict=args.strict,
+              debounce=args.debounce, quiet=args.quiet)
+        validator.close()
+        return
+        
+    reports = []
+    if args.junit or args.sarif:
+        from nfo_reports import JUnitWriter, SarifWriter
+        
+        if args.junit:
+            reports.append(JUnitWriter(args.junit))
+        if args.sarif:
+            reports.append(SarifWriter(args.sarif))
+        # Registered as hooks so each file's validation time is reported
+        for report in reports:
+            validator.add_hook(report)
+            
     # Process files
-    all_valid = True
-    for file_path in args.files:
-        if os.path.isdir(file_path):
-            # Validate directory
-            results = validator.validate_directory(file_path, recursive=args.recursive)
-            for filepath, is_valid, errors in results:
-                if not is_valid:
-                    all_valid = False
-                if not args.quiet or not is_valid:
-                    print(format_validation_result(filepath, is_valid, errors, args.format))
-        else:
-            # Validate single file
-            is_valid, errors = validator.validate_file(file_path, strict=args.strict)
-            if not is_valid:
-                all_valid = False
-            if not args.quiet or not is_valid:
-                print(format_validation_result(file_path, is_valid, errors, args.format))
+    max_invalid = 1 if args.fail_fast else args.max_errors
+    if args.git_diff:
+        from nfo_git import GitError, git_tasks
+        
+        # Only files changed since the revision (and their dependents)
+        try:
+            tasks = git_tasks(validator.discovery, args.files, args.git_diff,
+                              args.recursive, args.strict)
+        except GitError as e:
+            parser.error(f"--git-diff: {e}")
+        results = _iter_git_results(validator, tasks, args.jobs)
+    else:
+        results = _iter_results(validator, args.files, args.recursive, args.strict,
+                                args.jobs, shard)
+    files = invalid = inconsistent = 0
+    stopped = False
+    for filepath, is_valid, errors in results:
+        files += 1
+        if not is_valid:
+            invalid += 1
+        for report in reports:
+            report.add(filepath, is_valid, errors)
+        if not args.quiet or not is_valid:
+            print(format_validation_result(filepath, is_valid, errors, args.format),
+                  flush=args.format == 'ndjson')
+        if max_invalid and invalid >= max_invalid:
+            # Closing the generator terminates any pool workers still busy
+            results.close()
+            stopped = True
+            print(f"Stopped after {invalid} invalid file(s)", file=sys.stderr)
+            break
+            
+    if validator.index is not None and not stopped:
+        # Reported as further results for the files concerned
+        for filepath, errors in validator.index.check():
+            inconsistent += 1
+            for report in reports:
+                report.add(filepath, False, errors)
+            print(format_validation_result(filepath, False, errors, args.format),
+                  flush=args.format == 'ndjson')
+        print(f"Consistency: {len(validator.index)} files indexed, "
+              f"{inconsistent} with violations", file=sys.stderr)
+            
+    for report in reports:
+        report.close()
+        
+    if shard is not None and args.format == 'ndjson':
+        from nfo_shard import summary_record
+        
+        # Trailer giving `merge` this shard's totals even with --quiet
+        print(summary_record(shard, files, invalid))
+        
+    if validator.manifest is not None:
+        print(f"Manifest: {validator.manifest.hits} hits, {validator.manifest.misses} misses",
+              file=sys.stderr)
+    if validator.cache is not None:
+        print(validator.cache.stats.format_summary(), file=sys.stderr)
+    if validator.dedupe_stats is not None:
+        print(validator.dedupe_stats.format_summary(), file=sys.stderr)
+        if args.dedupe_report:
+            import json
+            
+            with open(args.dedupe_report, 'w', encoding='utf-8') as f:
+                json.dump(validator.dedupe_stats.summary(), f, indent=2)
+    if profiler is not None:
+        print(profiler.format_summary(), file=sys.stderr)
+        if args.profile_output:
+            profiler.write_json(args.profile_output)
+    validator.close()
     
     # Exit with appropriate code
-    sys.exit(0 if all_valid else 1)
+    sys.exit(0 if invalid == 0 and inconsistent == 0 else 1)
 
 
 if __name__ == "__main__":
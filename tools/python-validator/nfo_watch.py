@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+NFO Standard Watch Mode
+Validates NFO files as they are written, using inotify on Linux and falling
+back to polling elsewhere. Results are written as NDJSON, one line per file.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from nfo_discovery import FileDiscovery
+
+
+class InotifyWatcher:
+    """Reports files written under a set of directories using Linux inotify.
+    
+    Files are reported if a scan of their root by discovery would find them;
+    directories discovery skips are not watched.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, roots: List[str], recursive: bool = False,
+                 discovery: Optional[FileDiscovery] = None):
+        self.recursive = recursive
+        self.discovery = discovery or FileDiscovery()
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch descriptor -> (directory, the root it is under)
+        self._dirs: Dict[int, Tuple[str, str]] = {}
+        for root in roots:
+            self._watch_tree(root, root)
+
+    def _watch_tree(self, directory: str, root: str) -> List[str]:
+        """Watch directory (and subdirectories if recursive); return files already in it."""
+        existing = []
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+        self._dirs[wd] = (directory, root)
+
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return existing
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if self.recursive and entry.name not in self.discovery.skip_dirs:
+                    existing.extend(self._watch_tree(entry.path, root))
+            elif self.discovery.matches(entry.path, root):
+                existing.append(entry.path)
+        return existing
+
+    def read(self, timeout: Optional[float]) -> List[str]:
+        """Wait up to timeout seconds and return the files written meanwhile."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        changed = []
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                print("Warning: inotify queue overflowed; some changes were missed",
+                      file=sys.stderr)
+                continue
+            if mask & self.IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+
+            if wd not in self._dirs:
+                continue
+            directory, root = self._dirs[wd]
+            path = os.path.join(directory, name)
+
+            if mask & self.IN_ISDIR:
+                # A directory created or moved in: watch it and pick up any
+                # NFO files it already contains.
+                if (self.recursive and mask & (self.IN_CREATE | self.IN_MOVED_TO)
+                        and name not in self.discovery.skip_dirs):
+                    try:
+                        changed.extend(self._watch_tree(path, root))
+                    except OSError:
+                        pass
+            elif mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO):
+                if self.discovery.matches(path, root):
+                    changed.append(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Reports changed files by comparing snapshots of what discovery finds."""
+
+    def __init__(self, roots: List[str], recursive: bool = False,
+                 discovery: Optional[FileDiscovery] = None, interval: float = 2.0):
+        self.roots = roots
+        self.recursive = recursive
+        self.discovery = discovery or FileDiscovery()
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for path in self.discovery.iter_files(root, self.recursive):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout: Optional[float]) -> List[str]:
+        """Wait up to timeout seconds and return the files changed meanwhile."""
+        delay = self._next_scan - time.monotonic()
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            return []
+        if delay > 0:
+            time.sleep(delay)
+
+        snapshot = self._scan()
+        self._next_scan = time.monotonic() + self.interval
+        changed = [path for path, state in snapshot.items()
+                   if self._snapshot.get(path) != state]
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(roots: List[str], recursive: bool = False,
+                 discovery: Optional[FileDiscovery] = None, poll_interval: float = 2.0):
+    """Return an inotify watcher where available, otherwise a polling one.
+    
+    Either reports the files a scan with discovery (by default, of *.nfo
+    files) would find.
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(roots, recursive, discovery)
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify unavailable ({e}); polling instead", file=sys.stderr)
+    return PollingWatcher(roots, recursive, discovery, poll_interval)
+
+
+def watch(validator, roots: List[str], recursive: bool = False, strict: bool = False,
+          debounce: float = 1.0, quiet: bool = False, out: TextIO = sys.stdout,
+          watcher=None):
+    """Validate NFO files under roots as they change, until interrupted.
+
+    A file is validated once no further writes to it have been seen for
+    `debounce` seconds, so a burst of writes from a scraper yields one result.
+    Files are selected by validator.discovery, as in a scan.
+    """
+    if watcher is None:
+        watcher = make_watcher(roots, recursive, validator.discovery)
+
+    # path -> monotonic time of the last write seen
+    pending: Dict[str, float] = {}
+    try:
+        while True:
+            if pending:
+                timeout = max(0.0, min(pending.values()) + debounce - time.monotonic())
+            else:
+                timeout = None
+
+            for path in watcher.read(timeout):
+                pending[path] = time.monotonic()
+
+            now = time.monotonic()
+            ready = [path for path, seen in pending.items() if now - seen >= debounce]
+            for path in ready:
+                del pending[path]
+                if not os.path.isfile(path):
+                    continue
+                is_valid, errors = validator.validate_file(path, strict=strict)
+                if quiet and is_valid:
+                    continue
+                out.write(json.dumps({"file": path, "valid": is_valid, "errors": errors}) + "\n")
+                out.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
@@ -1,8 +1,15 @@
+from glob import glob
 from setuptools import setup, find_packages
 
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
+# Bundle the schemas from the repository so validation works offline
+schema_files = []
+for version in ("v1", "v2"):
+    schema_files.append((f"share/nfostandard/{version}", glob(f"../../{version}/main.xsd")))
+    schema_files.append((f"share/nfostandard/{version}/Schemas", glob(f"../../{version}/Schemas/*.xsd")))
+
 setup(
     name="nfo-validate",
     version="1.0.0",
@@ -13,6 +20,12 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/Biztactix/NFOStandard",
     packages=find_packages(),
+    py_modules=["nfo_validator", "nfo_schemas", "nfo_manifest", "nfo_server", "nfo_client",
+                "nfo_watch", "nfo_rules", "nfo_profile", "nfo_archive", "nfo_shard",
+                "nfo_discovery", "nfo_dedupe", "nfo_git",
+                "nfo_reports", "nfo_limits", "nfo_consistency",
+                "nfo_async", "nfo_cache", "nfo_pool"],
+    data_files=schema_files,
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -33,6 +46,7 @@ setup(
     entry_points={
         "console_scripts": [
             "nfo-validate=nfo_validator:main",
+            "nfo-validate-client=nfo_client:main",
         ],
     },
 )
\ No newline at end of file